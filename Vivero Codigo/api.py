@@ -0,0 +1,179 @@
+from typing import List, Optional
+from urllib.parse import quote
+
+from fastapi import Depends, FastAPI, HTTPException, Query, Response, status
+from fastapi.responses import PlainTextResponse
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from pydantic import BaseModel, Field
+
+import auth
+import metrics
+import services
+import storage
+
+# API HTTP/JSON para terminales de punto de venta e integraciones. Usa la misma
+# capa de servicios que la aplicación de Streamlit. Para levantarla:
+#
+#     uvicorn api:app --host 0.0.0.0 --port 8000
+#
+# Un solo proceso: las sesiones viven en la memoria del proceso (auth.py). Los
+# endpoints son funciones normales (no async): FastAPI las ejecuta en su grupo
+# de hilos, cada hilo con su propia conexión a SQLite, así una consulta a la
+# base de datos nunca bloquea el bucle de eventos del servidor.
+
+app = FastAPI(title="Vivero Andalucia")
+
+_bearer = HTTPBearer()
+
+
+class Credentials(BaseModel):
+    username: str
+    password: str
+
+
+class StockLevel(BaseModel):
+    ID: str
+    Cantidad: int = Field(ge=0)
+
+
+class StockUpdate(BaseModel):
+    articulos: List[StockLevel]
+
+
+class Restock(BaseModel):
+    Cantidad: int = Field(gt=0)
+    referencia: Optional[str] = None
+
+
+class SaleLine(BaseModel):
+    ID: str
+    Cantidad: int = Field(gt=0)
+    categoria: Optional[str] = None
+
+
+class Sale(BaseModel):
+    categoria: str = "plantas"
+    cliente: str
+    articulos: List[SaleLine]
+
+
+# --------------------------------------------------------------------------------
+# Autenticación: el token de sesión va en la cabecera "Authorization: Bearer ..."
+# --------------------------------------------------------------------------------
+def current_session(credentials: HTTPAuthorizationCredentials = Depends(_bearer)):
+    session = auth.session_user(credentials.credentials)
+    if session is None:
+        raise HTTPException(status.HTTP_401_UNAUTHORIZED, "Sesión inválida o expirada.")
+    return session
+
+
+def require_role(*roles):
+    def check(session=Depends(current_session)):
+        if session["role"] not in roles:
+            raise HTTPException(status.HTTP_403_FORBIDDEN, "No tienes permisos para esta operación.")
+        return session
+    return check
+
+
+@app.post("/sesiones")
+def login(credentials: Credentials):
+    auth.ensure_default_user()
+    try:
+        token = auth.authenticate(credentials.username, credentials.password)
+    except auth.AuthenticationError as e:
+        raise HTTPException(status.HTTP_401_UNAUTHORIZED, str(e))
+    return {"token": token, "role": auth.session_user(token)["role"]}
+
+
+@app.delete("/sesiones", status_code=status.HTTP_204_NO_CONTENT)
+def logout(credentials: HTTPAuthorizationCredentials = Depends(_bearer)):
+    auth.end_session(credentials.credentials)
+
+
+# --------------------------------------------------------------------------------
+# Inventario
+# --------------------------------------------------------------------------------
+@app.get("/inventario/{categoria}")
+def search_stock(categoria: str, buscar: str = "", pagina: int = Query(1, ge=1),
+                 por_pagina: int = Query(50, ge=1, le=1000), con_stock: bool = False,
+                 session=Depends(current_session)):
+    try:
+        page, total = services.search_stock(categoria, buscar, pagina, por_pagina, con_stock)
+    except services.NotFoundError as e:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, str(e))
+    return {"total": total, "pagina": pagina, "articulos": services.records(page)}
+
+
+@app.get("/inventario/{categoria}/{item_id}")
+def get_item(categoria: str, item_id: str, session=Depends(current_session)):
+    try:
+        item = services.get_item(categoria, item_id)
+    except services.NotFoundError as e:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, str(e))
+    return services.item_record(item)
+
+
+@app.put("/inventario/{categoria}/stock")
+def update_stock(categoria: str, update: StockUpdate, session=Depends(require_role("admin", "bodega"))):
+    try:
+        return services.update_stock(categoria, [level.model_dump() for level in update.articulos])
+    except services.NotFoundError as e:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, str(e))
+    except services.ValidationError as e:
+        raise HTTPException(status.HTTP_422_UNPROCESSABLE_ENTITY, str(e))
+
+
+@app.post("/inventario/{categoria}/{item_id}/reposicion")
+def restock_item(categoria: str, item_id: str, restock: Restock, session=Depends(require_role("admin", "bodega"))):
+    try:
+        quantity = services.restock_item(categoria, item_id, restock.Cantidad, restock.referencia)
+    except services.NotFoundError as e:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, str(e))
+    except services.ValidationError as e:
+        raise HTTPException(status.HTTP_422_UNPROCESSABLE_ENTITY, str(e))
+    return {"ID": storage.canonical_id(item_id), "Cantidad": quantity}
+
+
+@app.get("/inventario/{categoria}/{item_id}/movimientos")
+def item_movements(categoria: str, item_id: str, limite: int = Query(500, ge=1, le=5000),
+                   session=Depends(current_session)):
+    try:
+        movements = services.item_movements(categoria, item_id, limite)
+    except services.NotFoundError as e:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, str(e))
+    return services.records(movements.reset_index())
+
+
+# --------------------------------------------------------------------------------
+# Ventas y facturas
+# --------------------------------------------------------------------------------
+@app.post("/ventas", status_code=status.HTTP_201_CREATED)
+def record_sale(sale: Sale, session=Depends(require_role("admin", "vendedor"))):
+    try:
+        lines = [{"Categoria": line.categoria, "ID": line.ID, "Cantidad": line.Cantidad} for line in sale.articulos]
+        return services.record_sale(sale.categoria, lines, sale.cliente)
+    except services.NotFoundError as e:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, str(e))
+    except services.ValidationError as e:
+        raise HTTPException(status.HTTP_422_UNPROCESSABLE_ENTITY, str(e))
+    except storage.InsufficientStockError as e:
+        raise HTTPException(status.HTTP_409_CONFLICT, str(e))
+
+
+@app.get("/ventas/{venta}/factura")
+def sale_invoice(venta: int, session=Depends(current_session)):
+    try:
+        file_name, pdf_bytes = services.sale_invoice(venta)
+    except services.NotFoundError as e:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, str(e))
+    return Response(pdf_bytes, media_type="application/pdf",
+                    headers={"Content-Disposition": f"attachment; filename*=UTF-8''{quote(file_name)}"})
+
+
+# --------------------------------------------------------------------------------
+# Métricas de rendimiento de este proceso en formato de Prometheus. Sin sesión,
+# para que las pueda leer el recolector: solo expone latencias y contadores.
+# --------------------------------------------------------------------------------
+@app.get("/metricas", response_class=PlainTextResponse)
+def performance_metrics():
+    return metrics.prometheus_text()
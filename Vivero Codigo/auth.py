@@ -0,0 +1,118 @@
+import hashlib
+import hmac
+import secrets
+import threading
+import time
+
+import storage
+
+# PBKDF2-SHA256 con sal por usuario. El costo se paga solo al iniciar sesión:
+# las recargas posteriores se validan con el token de sesión.
+HASH_ALGORITHM = "pbkdf2_sha256"
+HASH_ITERATIONS = 600000
+
+# Credenciales predeterminadas cuando todavía no hay usuarios
+DEFAULT_USERNAME = "admin"
+DEFAULT_PASSWORD = "admin123"
+
+# Duración de una sesión sin actividad (segundos)
+SESSION_TTL = 12 * 60 * 60
+
+# Sesiones activas del proceso: {token: {"username", "role", "expires"}}
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+class AuthenticationError(Exception):
+    pass
+
+
+# --------------------------------------------------------------------------------
+# Hash de contraseñas: "pbkdf2_sha256$iteraciones$sal$hash"
+# --------------------------------------------------------------------------------
+def hash_password(password, iterations=HASH_ITERATIONS):
+    salt = secrets.token_hex(16)
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode(), bytes.fromhex(salt), iterations).hex()
+    return f"{HASH_ALGORITHM}${iterations}${salt}${digest}"
+
+
+def _is_legacy_hash(stored):
+    # Formato antiguo: SHA-256 sin sal de una sola pasada (64 caracteres hex)
+    return "$" not in stored and len(stored) == 64
+
+
+def needs_rehash(stored):
+    if _is_legacy_hash(stored):
+        return True
+    algorithm, iterations, _, _ = stored.split("$")
+    return algorithm != HASH_ALGORITHM or int(iterations) < HASH_ITERATIONS
+
+
+def verify_password(password, stored):
+    if _is_legacy_hash(stored):
+        candidate = hashlib.sha256(password.encode()).hexdigest()
+        return hmac.compare_digest(candidate, stored)
+    algorithm, iterations, salt, digest = stored.split("$")
+    if algorithm != HASH_ALGORITHM:
+        return False
+    candidate = hashlib.pbkdf2_hmac("sha256", password.encode(), bytes.fromhex(salt), int(iterations)).hex()
+    return hmac.compare_digest(candidate, digest)
+
+
+# --------------------------------------------------------------------------------
+# Crea el usuario administrador predeterminado si no hay ningún usuario
+# --------------------------------------------------------------------------------
+def ensure_default_user():
+    if not storage.read_user_index():
+        storage.insert_user(DEFAULT_USERNAME, hash_password(DEFAULT_PASSWORD), "admin")
+
+
+# --------------------------------------------------------------------------------
+# Inicio de sesión: valida contra el diccionario de usuarios en caché y, si la
+# contraseña usaba el hash antiguo, la vuelve a guardar con el formato actual.
+# Devuelve el token de la nueva sesión.
+# --------------------------------------------------------------------------------
+def authenticate(username, password):
+    user = storage.read_user_index().get(username)
+    if user is None:
+        raise AuthenticationError("Usuario no encontrado.")
+    stored, role = user
+    if not verify_password(password, stored):
+        raise AuthenticationError("Contraseña incorrecta.")
+    if needs_rehash(stored):
+        storage.update_user_password(username, hash_password(password))
+    return start_session(username, role)
+
+
+def start_session(username, role):
+    token = secrets.token_urlsafe(32)
+    now = time.time()
+    with _sessions_lock:
+        for expired in [t for t, session in _sessions.items() if session["expires"] < now]:
+            del _sessions[expired]
+        _sessions[token] = {"username": username, "role": role, "expires": now + SESSION_TTL}
+    return token
+
+
+# --------------------------------------------------------------------------------
+# Sesión asociada a un token, o None si no existe o ya expiró. No toca la base
+# de datos: es una búsqueda en memoria en cada recarga de la página.
+# --------------------------------------------------------------------------------
+def session_user(token):
+    if not token:
+        return None
+    now = time.time()
+    with _sessions_lock:
+        session = _sessions.get(token)
+        if session is None:
+            return None
+        if session["expires"] < now:
+            del _sessions[token]
+            return None
+        session["expires"] = now + SESSION_TTL
+        return session
+
+
+def end_session(token):
+    with _sessions_lock:
+        _sessions.pop(token, None)
@@ -0,0 +1,261 @@
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+import storage
+import services
+import invoices
+from bench import synthetic
+from ui import common as common_page, inventory as inventory_page, sales as sales_page
+
+# Pruebas de rendimiento de las rutas de inventario y ventas fuera de Streamlit.
+# Las funciones de las páginas (paquete ui) se ejecutan tal cual, con `st`
+# reemplazado por StubUI, que responde los widgets con valores fijos y descarta
+# lo que se muestra.
+#
+#     python -m bench.benchmark --sizes 1000 100000 1000000 --csv resultados.csv
+
+DEFAULT_SIZES = [1000, 100000, 1000000]
+
+
+class SessionState(dict):
+    __getattr__ = dict.get
+
+    def __setattr__(self, key, value):
+        self[key] = value
+
+
+class NamedBytesIO(io.BytesIO):
+    def __init__(self, data, name):
+        super().__init__(data)
+        self.name = name
+
+
+# --------------------------------------------------------------------------------
+# Sustituto de `streamlit`: cada widget devuelve la respuesta registrada para su
+# etiqueta o su valor predeterminado. Los mensajes se guardan para poder
+# comprobar que la operación medida no terminó en error.
+# --------------------------------------------------------------------------------
+class StubUI:
+    def __init__(self, answers=None):
+        self.answers = answers or {}
+        self.session_state = SessionState()
+        self.sidebar = self
+        self.messages = []
+
+    def _answer(self, label, default):
+        return self.answers.get(label, default)
+
+    def text_input(self, label, value="", **kwargs):
+        return self._answer(label, value)
+
+    def text_area(self, label, value="", **kwargs):
+        return self._answer(label, value)
+
+    def number_input(self, label, min_value=None, max_value=None, value=None, step=None, **kwargs):
+        return self._answer(label, value if value is not None else (min_value or 0))
+
+    def selectbox(self, label, options, index=0, **kwargs):
+        options = list(options)
+        answer = self.answers.get(label)
+        if callable(answer):
+            return answer(options)
+        if answer is not None:
+            return answer
+        return options[index] if options else None
+
+    radio = selectbox
+
+    def button(self, label, **kwargs):
+        return self._answer(label, False)
+
+    def checkbox(self, label, value=False, **kwargs):
+        return self._answer(label, value)
+
+    def date_input(self, label, value=None, **kwargs):
+        return self._answer(label, value)
+
+    def file_uploader(self, label, **kwargs):
+        upload = self.answers.get(label)
+        return upload() if callable(upload) else upload
+
+    def columns(self, spec):
+        return [self] * (spec if isinstance(spec, int) else len(spec))
+
+    def spinner(self, *args, **kwargs):
+        return contextlib.nullcontext()
+
+    expander = container = spinner
+
+    def rerun(self):
+        pass
+
+    def _message(self, kind):
+        return lambda body, *args, **kwargs: self.messages.append((kind, body))
+
+    def __getattr__(self, name):
+        if name in ("success", "error", "warning", "info"):
+            return self._message(name)
+        return lambda *args, **kwargs: None
+
+    def errors(self):
+        return [body for kind, body in self.messages if kind == "error"]
+
+
+# --------------------------------------------------------------------------------
+# Medición: repite la llamada hasta `repeat` veces o hasta agotar `budget`
+# segundos, y mide la memoria pico con tracemalloc en una ejecución aparte
+# --------------------------------------------------------------------------------
+def measure(function, repeat, budget, memory=True, setup=None):
+    timings = []
+    started = time.perf_counter()
+    while len(timings) < repeat and (not timings or time.perf_counter() - started < budget):
+        if setup:
+            setup()
+        begin = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - begin)
+
+    peak = None
+    if memory:
+        if setup:
+            setup()
+        tracemalloc.start()
+        function()
+        peak = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+
+    timings_ms = sorted(t * 1000 for t in timings)
+    return {
+        "Repeticiones": len(timings_ms),
+        "p50 ms": statistics.median(timings_ms),
+        "p95 ms": timings_ms[min(int(len(timings_ms) * 0.95), len(timings_ms) - 1)],
+        "Máx ms": timings_ms[-1],
+        "Memoria pico MB": peak,
+    }
+
+
+def _use_stub(answers):
+    ui = StubUI(answers)
+    for module in (common_page, inventory_page, sales_page):
+        module.st = ui
+    return ui
+
+
+def _check(ui, name):
+    if ui.errors():
+        raise RuntimeError(f"{name}: {ui.errors()[0]}")
+
+
+# --------------------------------------------------------------------------------
+# Casos medidos para un tamaño de datos. Cada uno devuelve (nombre, función,
+# preparación opcional)
+# --------------------------------------------------------------------------------
+def cases(catalog, sales):
+    plants_csv = catalog["plantas"].to_csv(index=False).encode("utf-8")
+    busiest_day = pd.to_datetime(sales["Fecha"]).dt.date.value_counts().idxmax()
+    sale_id = sales.index[len(sales) // 2]
+
+    def browse_inventory():
+        ui = _use_stub({})
+        inventory_page.browse_inventory("plantas")
+        _check(ui, "browse_inventory")
+
+    def register_sale():
+        ui = _use_stub({
+            "Categoría": "plantas",
+            "Agregar al carrito": True,
+            "Nombre del Cliente": "Benchmark",
+            "Registrar Venta": True,
+        })
+        sales_page.register_sale()
+        _check(ui, "register_sale")
+
+    def view_sales_by_date():
+        ui = _use_stub({"Selecciona la fecha": busiest_day})
+        sales_page.view_sales_by_date()
+        _check(ui, "view_sales_by_date")
+
+    def bulk_load_inventory():
+        ui = _use_stub({
+            "Cargar archivo CSV o Excel para planta": lambda: NamedBytesIO(plants_csv, "plantas.csv"),
+            "Importar archivo": True,
+        })
+        inventory_page.bulk_load_inventory("plantas")
+        _check(ui, "bulk_load_inventory")
+
+    def sale_invoice():
+        services.sale_invoice(sale_id)
+
+    return [
+        ("browse_inventory", browse_inventory, None),
+        ("register_sale", register_sale, None),
+        ("view_sales_by_date", view_sales_by_date, None),
+        (f"bulk_load_inventory ({len(catalog['plantas'])} filas)", bulk_load_inventory, None),
+        ("sale_invoice (sin caché)", sale_invoice, invoices._invoice_cache.clear),
+        ("sale_invoice (con caché)", sale_invoice, None),
+    ]
+
+
+# --------------------------------------------------------------------------------
+# Corre todas las pruebas para un tamaño: `size` artículos en el catálogo y
+# `size` ventas en el historial, sobre una base de datos nueva en una carpeta
+# temporal (sin los CSV del repositorio)
+# --------------------------------------------------------------------------------
+def run_size(size, repeat, budget, memory, years, seed):
+    results = []
+    previous_dir, previous_db = os.getcwd(), storage.DB_FILE
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        try:
+            storage.set_database(os.path.join(workdir, os.path.basename(storage.DB_FILE)))
+            catalog = synthetic.generate_catalog(size, seed)
+            sales, items = synthetic.generate_sales(catalog["plantas"], size, years, seed)
+
+            begin = time.perf_counter()
+            for category, inventory in catalog.items():
+                storage.replace_inventory(inventory, category)
+            storage.replace_sales(sales, items)
+            results.append({"Prueba": "carga inicial", "Filas": size, "Repeticiones": 1,
+                            "p50 ms": (time.perf_counter() - begin) * 1000})
+
+            for name, function, setup in cases(catalog, sales):
+                print(f"  {size}: {name}...", flush=True)
+                results.append({"Prueba": name, "Filas": size,
+                                **measure(function, repeat, budget, memory, setup)})
+        finally:
+            storage.set_database(previous_db)
+            os.chdir(previous_dir)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pruebas de rendimiento de inventario y ventas.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--repeat", type=int, default=20, help="máximo de repeticiones por prueba")
+    parser.add_argument("--budget", type=float, default=10.0, help="segundos máximos por prueba")
+    parser.add_argument("--no-memory", action="store_true", help="no medir memoria (tracemalloc es lento)")
+    parser.add_argument("--years", type=int, default=3, help="años del historial de ventas")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--csv", help="guardar los resultados en este archivo")
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        results += run_size(size, args.repeat, args.budget, not args.no_memory, args.years, args.seed)
+
+    report = pd.DataFrame(results)
+    print(report.to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+    if args.csv:
+        report.to_csv(args.csv, index=False)
+
+
+if __name__ == "__main__":
+    main()
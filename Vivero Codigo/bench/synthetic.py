@@ -0,0 +1,184 @@
+import argparse
+import datetime
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import storage
+
+# Generador de datos sintéticos: catálogos con nombres reales (tomados de los
+# catálogos de proveedores del repositorio cuando están disponibles) e
+# historiales de ventas de varios años con estacionalidad y productos más
+# vendidos que otros. Todo se genera de forma vectorizada con una semilla fija.
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+# Catálogos de proveedores (sin encabezado: código y nombre)
+CATALOG_FILES = {
+    "plantas": "plantas (1).xlsx",
+    "herramientas": "herramientas (1).xlsx",
+    "productos": "productos (1).xlsx",
+    "maceteros": "Maceteros.xlsx",
+}
+
+# Nombres de respaldo si no están los catálogos
+FALLBACK_NAMES = {
+    "plantas": ["ROSAS", "GIRASOL", "ORQUIDEA", "ANTURIO", "HELECHO", "BEGONIA", "CACTUS", "BONSAI"],
+    "herramientas": ["PALA", "RASTRILLO", "TIJERA PODADORA", "MANGUERA", "ASPERSOR", "AZADON"],
+    "productos": ["FERTILIZANTE LIQUIDO", "ABONO ORGANICO", "TIERRA NEGRA", "CASCARILLA", "INSECTICIDA"],
+    "maceteros": ["MATERA PLASTICA", "MATERA BARRO", "CANASTA COLGANTE", "JARDINERA"],
+}
+
+# Primer código de cada categoría (como en los catálogos de proveedores)
+FIRST_ID = {"plantas": 10001, "herramientas": 70001, "productos": 40001, "maceteros": 80001}
+
+# Parte del catálogo que corresponde a cada categoría
+CATEGORY_SHARE = {"plantas": 0.6, "herramientas": 0.1, "productos": 0.2, "maceteros": 0.1}
+
+# Rango de precios por categoría (pesos, múltiplos de 500)
+PRICE_RANGES = {
+    "plantas": (2000, 80000),
+    "herramientas": (8000, 150000),
+    "productos": (5000, 120000),
+    "maceteros": (3000, 60000),
+}
+
+DESCRIPTIONS = {
+    "plantas": ["LUZ DIRECTA", "LUZ INDIRECTA", "EN LA SOMBRA", "RIEGO MODERADO", "RIEGO ABUNDANTE"],
+    "herramientas": ["NUEVO", "EN BUEN ESTADO", "USO PROFESIONAL"],
+    "productos": ["BULTO", "LITRO", "KILO", "SOBRE"],
+    "maceteros": ["PEQUEÑO", "MEDIANO", "GRANDE"],
+}
+
+FIRST_NAMES = ["Matias", "Emanuel", "Laura", "Camila", "Andres", "Sofia", "Juan", "Valentina",
+               "Carlos", "Daniela", "Santiago", "Mariana", "Felipe", "Isabela", "Jorge", "Paula"]
+LAST_NAMES = ["Morales", "Chaverra", "Gomez", "Rodriguez", "Lopez", "Martinez", "Restrepo",
+              "Castaño", "Zapata", "Ospina", "Herrera", "Cardona", "Velez", "Arango"]
+
+
+def _name_pool(category):
+    path = REPO_ROOT / CATALOG_FILES[category]
+    if path.exists():
+        names = pd.read_excel(path, header=None, usecols=[1], dtype=str)[1]
+        # Sin comas: el formato antiguo de ventas separa los productos con comas
+        names = names.dropna().str.replace(",", " ").str.split().str.join(" ").str.upper()
+        names = names[names != ""].drop_duplicates().tolist()
+        if names:
+            return names
+    return FALLBACK_NAMES[category]
+
+
+# --------------------------------------------------------------------------------
+# Catálogo de `rows` artículos repartidos entre las cuatro categorías. Devuelve
+# {categoría: DataFrame con las columnas del inventario}.
+# --------------------------------------------------------------------------------
+def generate_catalog(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    catalog = {}
+    remaining = rows
+    for position, (category, share) in enumerate(CATEGORY_SHARE.items()):
+        count = remaining if position == len(CATEGORY_SHARE) - 1 else int(round(rows * share))
+        remaining -= count
+        pool = pd.Series(_name_pool(category))
+        index = np.arange(count)
+        # Más artículos que nombres: se repiten con un número de variedad
+        names = pool.take(index % len(pool)).reset_index(drop=True)
+        variety = pd.Series(index // len(pool) + 1)
+        names = names.where(variety == 1, names + " #" + variety.astype(str))
+        low, high = PRICE_RANGES[category]
+        # Uno de cada diez artículos con poco stock
+        quantity = np.where(rng.random(count) < 0.1, rng.integers(0, 11, count), rng.integers(11, 200, count))
+        catalog[category] = pd.DataFrame({
+            "ID": (FIRST_ID[category] + index).astype(str),
+            "Nombre": names,
+            "Cantidad": quantity,
+            "Precio Unitario": (rng.integers(low // 500, high // 500 + 1, count) * 500).astype(float),
+            "Descripción": rng.choice(DESCRIPTIONS[category], count),
+        })
+    return catalog
+
+
+def _day_weights(days):
+    # Más ventas los fines de semana, en mayo (Día de la Madre) y en diciembre
+    weekday = np.where(days.dayofweek >= 5, 1.6, 1.0)
+    month = np.select([days.month == 5, days.month == 12], [1.4, 1.5], 1.0)
+    weights = weekday * month
+    return weights / weights.sum()
+
+
+# --------------------------------------------------------------------------------
+# Historial de `rows` ventas de plantas durante `years` años hasta `end`.
+# Devuelve (cabeceras indexadas por Venta, líneas de venta), con las columnas
+# de storage.SALES_COLUMNS y storage.SALE_ITEM_COLUMNS.
+# --------------------------------------------------------------------------------
+def generate_sales(plants, rows, years=3, seed=0, end=None):
+    rng = np.random.default_rng(seed + 1)
+    end = pd.Timestamp(end or datetime.date.today())
+    days = pd.date_range(end - pd.DateOffset(years=years), end - pd.Timedelta(days=1), freq="D")
+    dates = (days.values[rng.choice(len(days), rows, p=_day_weights(days))]
+             + pd.to_timedelta(rng.integers(8 * 3600, 18 * 3600, rows), unit="s").values)
+    dates.sort()
+    customers = (pd.Series(rng.choice(FIRST_NAMES, rows)) + " " + pd.Series(rng.choice(LAST_NAMES, rows)))
+
+    # Entre 1 y 4 líneas por venta; la popularidad de las plantas sigue una ley de Zipf
+    lines_per_sale = 1 + rng.binomial(3, 0.3, rows)
+    popularity = 1.0 / np.arange(1, len(plants) + 1) ** 1.1
+    popularity = rng.permutation(popularity / popularity.sum())
+    chosen = rng.choice(len(plants), lines_per_sale.sum(), p=popularity)
+    sale_ids = np.arange(1, rows + 1)
+
+    items = pd.DataFrame({
+        "Venta": np.repeat(sale_ids, lines_per_sale),
+        "ID": plants["ID"].to_numpy()[chosen],
+        "Nombre": plants["Nombre"].to_numpy()[chosen],
+        "Cantidad": 1 + rng.poisson(1.0, len(chosen)),
+        "Precio Unitario": plants["Precio Unitario"].to_numpy()[chosen],
+    })
+    items["Total"] = items["Cantidad"] * items["Precio Unitario"]
+
+    totals = items.groupby("Venta")[["Cantidad", "Total"]].sum()
+    sales = pd.DataFrame({
+        "Fecha": pd.DatetimeIndex(dates).strftime(storage.DATE_FORMAT),
+        "Cliente": customers.to_numpy(),
+        "Cantidad": totals["Cantidad"].to_numpy(),
+        "Total": totals["Total"].to_numpy(),
+    }, index=pd.Index(sale_ids, name="Venta"))
+    return sales, items
+
+
+# --------------------------------------------------------------------------------
+# Escribe los datos en los formatos CSV del repositorio: un archivo de
+# inventario por categoría y ventas.csv con el formato antiguo (plantas y
+# precios unidos por comas), listos para la importación inicial de la aplicación
+# --------------------------------------------------------------------------------
+def write_csv(out_dir, catalog, sales, items):
+    os.makedirs(out_dir, exist_ok=True)
+    for category, inventory in catalog.items():
+        inventory.to_csv(os.path.join(out_dir, storage.inventory_files[category]), index=False)
+
+    joined = items.assign(**{"Precio Unitario": items["Precio Unitario"].astype(str)}).groupby("Venta").agg(
+        {"Nombre": ", ".join, "Precio Unitario": ", ".join})
+    legacy = sales.assign(Planta="", Plantas=joined["Nombre"], **{"Precio Unitario": joined["Precio Unitario"]})
+    legacy = legacy[["Fecha", "Cliente", "Planta", "Cantidad", "Precio Unitario", "Total", "Plantas"]]
+    legacy.to_csv(os.path.join(out_dir, storage.SALES_FILE), index=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera inventarios e historiales de ventas sintéticos.")
+    parser.add_argument("--items", type=int, default=1000, help="artículos del catálogo (todas las categorías)")
+    parser.add_argument("--sales", type=int, default=10000, help="ventas del historial")
+    parser.add_argument("--years", type=int, default=3, help="años de historial")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="datos_sinteticos", help="carpeta de salida")
+    args = parser.parse_args()
+
+    catalog = generate_catalog(args.items, args.seed)
+    sales, items = generate_sales(catalog["plantas"], args.sales, args.years, args.seed)
+    write_csv(args.out, catalog, sales, items)
+    print(f"{args.items} artículos y {args.sales} ventas ({len(items)} líneas) en {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+import pandas as pd
+
+import storage
+import metrics
+
+# Filas por bloque: la memoria usada no depende del tamaño del archivo
+CHUNK_SIZE = 20000
+
+# Máximo de errores por fila que se guardan para mostrar en pantalla
+MAX_REPORTED_ERRORS = 200
+
+# Los catálogos de proveedores (.xlsx del repositorio) no traen encabezado:
+# solo código y nombre del artículo
+HEADERLESS_COLUMNS = ["ID", "Nombre", "Cantidad", "Precio Unitario", "Descripción"]
+
+
+def _has_header(values):
+    names = {storage.COLUMN_ALIASES.get(str(v).strip(), str(v).strip()) for v in values if v is not None}
+    return "ID" in names or "Nombre" in names
+
+
+# --------------------------------------------------------------------------------
+# Lectura por bloques de CSV: pandas lee el archivo de a CHUNK_SIZE filas.
+# Cada bloque se entrega junto con el número de fila del archivo donde empieza.
+# --------------------------------------------------------------------------------
+def _iter_csv(uploaded_file):
+    header = pd.read_csv(uploaded_file, nrows=0).columns
+    uploaded_file.seek(0)
+    if _has_header(header):
+        reader = pd.read_csv(uploaded_file, dtype=str, chunksize=CHUNK_SIZE)
+        first_row = 2
+    else:
+        names = HEADERLESS_COLUMNS[:len(header)]
+        reader = pd.read_csv(uploaded_file, dtype=str, header=None, chunksize=CHUNK_SIZE,
+                             names=names, usecols=range(len(names)))
+        first_row = 1
+    for chunk in reader:
+        yield first_row, chunk
+        first_row += len(chunk)
+
+
+# --------------------------------------------------------------------------------
+# Lectura por bloques de Excel: openpyxl en modo solo lectura recorre las filas
+# sin cargar la hoja completa en memoria
+# --------------------------------------------------------------------------------
+def _iter_xlsx(uploaded_file):
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(uploaded_file, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        first = next(rows, None)
+        if first is None:
+            return
+        if _has_header(first):
+            columns = [str(v).strip() if v is not None else f"_{i}" for i, v in enumerate(first)]
+            buffer, first_row = [], 2
+        else:
+            columns = HEADERLESS_COLUMNS[:len(first)]
+            buffer, first_row = [first[:len(columns)]], 1
+        for row in rows:
+            buffer.append(row[:len(columns)])
+            if len(buffer) == CHUNK_SIZE:
+                yield first_row, pd.DataFrame(buffer, columns=columns, dtype=object)
+                first_row += len(buffer)
+                buffer = []
+        if buffer:
+            yield first_row, pd.DataFrame(buffer, columns=columns, dtype=object)
+    finally:
+        workbook.close()
+
+
+def iter_chunks(uploaded_file, file_name):
+    if file_name.lower().endswith((".xlsx", ".xlsm")):
+        chunks = _iter_xlsx(uploaded_file)
+    else:
+        chunks = _iter_csv(uploaded_file)
+    for first_row, chunk in chunks:
+        yield first_row, storage.normalize_columns(chunk)
+
+
+def _clean_text(values):
+    values = values.astype("string").str.strip()
+    return values.astype(object).where(values.notna() & (values != ""), None)
+
+
+# Filas sin ningún dato (las hojas de Excel suelen arrastrar cientos al final):
+# no son errores, simplemente se ignoran
+def _blank_rows(chunk):
+    return chunk.apply(lambda column: _clean_text(column).isna()).all(axis=1)
+
+
+# --------------------------------------------------------------------------------
+# Validación vectorizada de un bloque. Devuelve las filas válidas y una lista de
+# (fila del archivo, motivo) con las descartadas. Las filas en blanco no cuentan.
+# --------------------------------------------------------------------------------
+def validate_chunk(chunk, first_row):
+    if "ID" not in chunk.columns or "Nombre" not in chunk.columns:
+        raise ValueError("El archivo debe contener al menos las columnas: ID, Nombre")
+
+    start = chunk.index[0] if len(chunk) else 0
+    chunk = chunk[~_blank_rows(chunk)].copy()
+    chunk["ID"] = _clean_text(chunk["ID"]).map(storage.canonical_id)
+    chunk["Nombre"] = _clean_text(chunk["Nombre"])
+
+    problems = pd.Series("", index=chunk.index)
+    problems[chunk["ID"].isna()] += "ID vacío. "
+    problems[chunk["Nombre"].isna()] += "Nombre vacío. "
+
+    for column in ["Cantidad", "Punto de Reorden"]:
+        if column in chunk.columns:
+            quantity = pd.to_numeric(chunk[column], errors="coerce")
+            invalid = quantity.isna() | (quantity < 0) | (quantity % 1 != 0)
+            problems[invalid & chunk[column].notna()] += f"{column} debe ser un entero mayor o igual a 0. "
+            chunk[column] = quantity.where(~invalid).astype("Int64")
+
+    if "Precio Unitario" in chunk.columns:
+        price = pd.to_numeric(chunk["Precio Unitario"], errors="coerce")
+        invalid = price.isna() | (price < 0)
+        problems[invalid & chunk["Precio Unitario"].notna()] += "Precio Unitario debe ser un número mayor o igual a 0. "
+        chunk["Precio Unitario"] = price.where(~invalid)
+
+    duplicated = chunk["ID"].notna() & chunk["ID"].duplicated(keep="last")
+    problems[duplicated] += "ID repetido en el archivo (se usa la última aparición). "
+
+    rejected = problems != ""
+    errors = [(first_row + position, reason.strip())
+              for position, reason in zip(chunk.index[rejected] - start, problems[rejected])]
+    return chunk[~rejected], errors
+
+
+# --------------------------------------------------------------------------------
+# Importa el archivo completo bloque a bloque y devuelve el resumen
+# --------------------------------------------------------------------------------
+@metrics.timed
+def import_inventory(uploaded_file, file_name, category, replace=False):
+    report = {"insertados": 0, "actualizados": 0, "filas_con_error": 0, "errores": []}
+    metrics.record_io(size=uploaded_file.getbuffer().nbytes)
+
+    def valid_chunks():
+        for first_row, chunk in iter_chunks(uploaded_file, file_name):
+            valid, errors = validate_chunk(chunk, first_row)
+            report["filas_con_error"] += len(errors)
+            room = MAX_REPORTED_ERRORS - len(report["errores"])
+            report["errores"].extend(errors[:max(room, 0)])
+            yield valid
+
+    report["insertados"], report["actualizados"] = storage.upsert_inventory(category, valid_chunks(), replace)
+    return report
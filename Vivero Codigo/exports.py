@@ -0,0 +1,205 @@
+import argparse
+import datetime
+import importlib.util
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+import pandas as pd
+
+import storage
+import metrics
+
+# Exportación para contabilidad: ventas e inventario en Parquet (columnar,
+# particionado por mes: ventas/mes=AAAA-MM/parte-*.parquet) y en libros de Excel
+# (uno por mes). Cada destino guarda en la base de datos la última venta que
+# exportó, así cada ejecución solo agrega las ventas nuevas. Corre en un proceso
+# aparte para no frenar la aplicación:
+#
+#     python exports.py                   # una vez
+#     python exports.py --intervalo 60    # cada hora
+#
+# Parquet necesita pyarrow (opcional); sin él solo se exporta a Excel.
+
+EXPORT_DIR = "exportaciones"
+
+# Ventas por bloque en la exportación a Parquet (memoria acotada y avance guardado)
+EXPORT_BATCH = 100000
+
+_job = None
+
+
+def parquet_available():
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def _write_atomic(path, write):
+    # Se escribe a un archivo temporal y se renombra: quien lea nunca ve un archivo a
+    # medias. El punto inicial lo oculta de los lectores de Parquet si algo falla.
+    directory, file_name = os.path.split(path)
+    os.makedirs(directory, exist_ok=True)
+    temporary = os.path.join(directory, f".{file_name}")
+    write(temporary)
+    os.replace(temporary, path)
+
+
+def _with_dates(frame):
+    return frame.assign(Fecha=pd.to_datetime(frame["Fecha"], format=storage.DATE_FORMAT))
+
+
+def _finished_at():
+    return datetime.datetime.now().strftime(storage.DATE_FORMAT)
+
+
+# --------------------------------------------------------------------------------
+# Parquet: las ventas nuevas se agregan como archivos nuevos en la carpeta de su
+# mes. El nombre lleva el ID de la primera venta del bloque, así repetir una
+# ejecución interrumpida sobrescribe los mismos archivos en vez de duplicarlos.
+# --------------------------------------------------------------------------------
+def _write_parquet_parts(frame, directory, part):
+    frame = _with_dates(frame)
+    for month, rows in frame.groupby(frame["Fecha"].dt.strftime("%Y-%m")):
+        path = os.path.join(directory, f"mes={month}", f"parte-{part:012d}.parquet")
+        _write_atomic(path, lambda temporary: rows.to_parquet(temporary, index=False))
+
+
+@metrics.timed
+def export_parquet(out_dir=EXPORT_DIR):
+    root = os.path.join(out_dir, "parquet")
+    state = storage.read_export_state("parquet")
+    history, inventory_version = storage.export_versions()
+    after = state["venta"]
+    if state["historial"] != history:
+        # Historial reemplazado: se vuelve a exportar completo
+        for name in ("ventas", "venta_items"):
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+        after = 0
+
+    until, exported = storage.last_sale_id(), 0
+    while after < until:
+        sales, items = storage.read_sales_batch(after, until, EXPORT_BATCH)
+        if sales.empty:
+            break
+        part = int(sales["Venta"].iloc[0])
+        _write_parquet_parts(sales, os.path.join(root, "ventas"), part)
+        _write_parquet_parts(items, os.path.join(root, "venta_items"), part)
+        after, exported = int(sales["Venta"].iloc[-1]), exported + len(sales)
+        storage.save_export_state("parquet", venta=after, historial=history)
+
+    if state["inventario"] != inventory_version:
+        inventory = storage.read_all_inventory()
+        _write_atomic(os.path.join(root, "inventario.parquet"),
+                      lambda temporary: inventory.to_parquet(temporary, index=False))
+    storage.save_export_state("parquet", venta=after, historial=history, inventario=inventory_version,
+                              fecha=_finished_at(), resultado=f"{exported} ventas nuevas")
+    return exported
+
+
+# --------------------------------------------------------------------------------
+# Excel: un libro por mes (hojas "Ventas" y "Lineas"). Solo se vuelven a escribir
+# los meses con ventas nuevas, leídos con el índice por fecha. openpyxl en modo
+# solo escritura agrega las filas sin armar la hoja completa en memoria.
+# --------------------------------------------------------------------------------
+def _write_workbook(path, sheets):
+    from openpyxl import Workbook
+
+    def write(temporary):
+        workbook = Workbook(write_only=True)
+        for name, frame in sheets.items():
+            sheet = workbook.create_sheet(name)
+            sheet.append(list(frame.columns))
+            for row in frame.astype(object).where(frame.notna(), None).itertuples(index=False, name=None):
+                sheet.append(row)
+        workbook.save(temporary)
+
+    _write_atomic(path, write)
+
+
+@metrics.timed
+def export_excel(out_dir=EXPORT_DIR):
+    root = os.path.join(out_dir, "excel")
+    state = storage.read_export_state("excel")
+    history, inventory_version = storage.export_versions()
+    after = state["venta"]
+    if state["historial"] != history:
+        if os.path.isdir(root):
+            for file_name in os.listdir(root):
+                if file_name.startswith("ventas_"):
+                    os.remove(os.path.join(root, file_name))
+        after = 0
+
+    until = storage.last_sale_id()
+    months = storage.sale_months_after(after, until)
+    for month in months:
+        start = datetime.date.fromisoformat(f"{month}-01")
+        end = (start + datetime.timedelta(days=32)).replace(day=1)
+        _write_workbook(os.path.join(root, f"ventas_{month}.xlsx"), {
+            "Ventas": _with_dates(storage.read_sales_between(start, end).reset_index()),
+            "Lineas": _with_dates(storage.read_sale_items_between(start, end)),
+        })
+
+    if state["inventario"] != inventory_version:
+        _write_workbook(os.path.join(root, "inventario.xlsx"),
+                        {category: storage.read_inventory(category) for category in storage.inventory_files})
+    storage.save_export_state("excel", venta=until, historial=history, inventario=inventory_version,
+                              fecha=_finished_at(), resultado=f"{len(months)} meses actualizados")
+    return len(months)
+
+
+# --------------------------------------------------------------------------------
+# Ejecuta todas las exportaciones. El error de un destino queda guardado en su
+# estado y no impide exportar el otro.
+# --------------------------------------------------------------------------------
+def run_export(out_dir=EXPORT_DIR):
+    exporters = {"excel": export_excel}
+    if parquet_available():
+        exporters["parquet"] = export_parquet
+    else:
+        storage.save_export_state("parquet", fecha=_finished_at(), resultado="pyarrow no está instalado")
+
+    failed = False
+    for target, exporter in exporters.items():
+        try:
+            exporter(out_dir)
+        except Exception as e:
+            storage.save_export_state(target, fecha=_finished_at(), resultado=f"Error: {e}")
+            failed = True
+    return not failed
+
+
+# --------------------------------------------------------------------------------
+# Exportación en segundo plano desde la aplicación: un proceso aparte (una sola
+# a la vez por proceso de Streamlit), con su salida en exportacion.log
+# --------------------------------------------------------------------------------
+def export_running():
+    return _job is not None and _job.poll() is None
+
+
+def start_background_export(out_dir=EXPORT_DIR):
+    global _job
+    if export_running():
+        return False
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, "exportacion.log"), "ab") as log:
+        _job = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--destino", out_dir],
+                                cwd=os.getcwd(), stdout=log, stderr=subprocess.STDOUT)
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta ventas e inventario a Parquet y Excel.")
+    parser.add_argument("--destino", default=EXPORT_DIR, help="carpeta de salida")
+    parser.add_argument("--intervalo", type=float, help="repetir cada tantos minutos")
+    args = parser.parse_args()
+
+    while True:
+        ok = run_export(args.destino)
+        if not args.intervalo:
+            sys.exit(0 if ok else 1)
+        time.sleep(args.intervalo * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+import io
+import re
+import zipfile
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import storage
+import metrics
+
+# Facturas ya generadas: {ID de venta: (huella de la venta, nombre, bytes)}
+INVOICE_CACHE_SIZE = 512
+_invoice_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+# Por debajo de este número de facturas no compensa arrancar procesos
+MIN_BATCH_FOR_WORKERS = 200
+
+
+# --------------------------------------------------------------------------------
+# Dibuja una factura en la página actual del PDF
+# --------------------------------------------------------------------------------
+def _draw_invoice(pdf, sale_data):
+    pdf.add_page()
+
+    # Configurar fuente
+    pdf.set_font("Arial", size=12)
+
+    # Título de la factura
+    pdf.cell(200, 10, txt="Factura de Venta - Vivero Andalucia", ln=True, align='C')
+    pdf.ln(10)
+
+    # Detalles del cliente
+    pdf.cell(100, 10, txt=f"Cliente: {sale_data['Cliente']}", ln=True)
+    pdf.cell(100, 10, txt=f"Fecha: {sale_data['Fecha']}", ln=True)
+    pdf.ln(10)
+
+    # Detalles de los artículos vendidos
+    pdf.cell(100, 10, txt="Artículos Comprados:", ln=True)
+    for plant_name, quantity, price, total in zip(sale_data["Plantas"], sale_data["Cantidad"], sale_data["Precio Unitario"], sale_data["Total"]):
+        pdf.cell(100, 10, txt=f"{plant_name} - Cantidad: {quantity} - Precio Unitario: ${price} - Total: ${total}", ln=True)
+
+    pdf.ln(10)
+
+    # Total de la venta
+    pdf.cell(100, 10, txt=f"Total de la Venta: ${sale_data['TotalVenta']}", ln=True)
+
+
+def _pdf_bytes(pdf):
+    # fpdf devuelve str (latin-1) y fpdf2 devuelve bytearray
+    output = pdf.output(dest="S")
+    return output.encode("latin-1") if isinstance(output, str) else bytes(output)
+
+
+def _new_pdf():
+    # fpdf se importa al generar la primera factura y no en el arranque de la
+    # aplicación o de la API
+    from fpdf import FPDF
+
+    pdf = FPDF()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    return pdf
+
+
+# --------------------------------------------------------------------------------
+# Genera la factura de una venta en memoria y devuelve los bytes del PDF
+# --------------------------------------------------------------------------------
+@metrics.timed
+def render_invoice(sale_data):
+    pdf = _new_pdf()
+    _draw_invoice(pdf, sale_data)
+    return _pdf_bytes(pdf)
+
+
+def invoice_filename(sale_data):
+    # Reemplazar caracteres no válidos en el nombre del archivo (como los dos puntos)
+    file_name = f"Factura_{sale_data['Fecha']}_{sale_data['Cliente']}.pdf"
+    return re.sub(r'[<>:"/\\|?*]', '', file_name)
+
+
+# --------------------------------------------------------------------------------
+# Arma los datos de la factura a partir de la cabecera y las líneas de la venta
+# --------------------------------------------------------------------------------
+def sale_invoice_data(sale, lines):
+    return {
+        "Cliente": sale["Cliente"],
+        "Fecha": sale["Fecha"],
+        "Plantas": lines["Nombre"].tolist(),
+        "Cantidad": lines["Cantidad"].tolist(),
+        "Precio Unitario": lines["Precio Unitario"].tolist(),
+        "Total": lines["Total"].tolist(),
+        "TotalVenta": sale["Total"]
+    }
+
+
+def _fingerprint(sale_data):
+    return (sale_data["Fecha"], sale_data["Cliente"], sale_data["TotalVenta"], len(sale_data["Plantas"]))
+
+
+def _cache_get(sale_id, fingerprint):
+    with _cache_lock:
+        entry = _invoice_cache.get(sale_id)
+        if entry is None or entry[0] != fingerprint:
+            metrics.increment("cache.facturas.fallo")
+            return None
+        _invoice_cache.move_to_end(sale_id)
+    metrics.increment("cache.facturas.acierto")
+    return entry[1], entry[2]
+
+
+def _cache_put(sale_id, fingerprint, file_name, pdf_bytes):
+    with _cache_lock:
+        _invoice_cache[sale_id] = (fingerprint, file_name, pdf_bytes)
+        _invoice_cache.move_to_end(sale_id)
+        while len(_invoice_cache) > INVOICE_CACHE_SIZE:
+            _invoice_cache.popitem(last=False)
+
+
+# --------------------------------------------------------------------------------
+# Factura de una venta por su ID: se genera una sola vez y luego sale de la caché
+# --------------------------------------------------------------------------------
+@metrics.timed
+def invoice_for_sale(sale_id):
+    sale = storage.read_sale(sale_id)
+    if sale is None:
+        return None
+    sale_data = sale_invoice_data(sale, storage.read_sale_items([sale_id]))
+    fingerprint = _fingerprint(sale_data)
+    cached = _cache_get(sale_id, fingerprint)
+    if cached is not None:
+        return cached
+    file_name, pdf_bytes = invoice_filename(sale_data), render_invoice(sale_data)
+    _cache_put(sale_id, fingerprint, file_name, pdf_bytes)
+    return file_name, pdf_bytes
+
+
+def _sales_in_range(start, end):
+    sales = storage.read_sales_between(start, end)
+    lines = storage.read_sale_items_between(start, end)
+    lines_by_sale = dict(iter(lines.groupby("Venta", sort=False)))
+    return [(sale_id, sale_invoice_data(sale, lines_by_sale.get(sale_id, lines.iloc[0:0])))
+            for sale_id, sale in sales.iterrows()]
+
+
+# --------------------------------------------------------------------------------
+# Facturas de un rango de fechas en un ZIP (una por venta). Las que no están en
+# caché se generan en paralelo con un grupo de procesos.
+# --------------------------------------------------------------------------------
+@metrics.timed
+def invoices_zip(start, end, workers=None):
+    sales = _sales_in_range(start, end)
+    if not sales:
+        return None, 0
+    pending, rendered = [], {}
+    for sale_id, sale_data in sales:
+        fingerprint = _fingerprint(sale_data)
+        cached = _cache_get(sale_id, fingerprint)
+        if cached is not None:
+            rendered[sale_id] = cached
+        else:
+            pending.append((sale_id, fingerprint, sale_data))
+
+    if len(pending) >= MIN_BATCH_FOR_WORKERS:
+        # "spawn" evita copiar con fork un proceso con hilos (Streamlit)
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            pdfs = list(pool.map(render_invoice, [p[2] for p in pending], chunksize=16))
+    else:
+        pdfs = [render_invoice(p[2]) for p in pending]
+
+    for (sale_id, fingerprint, sale_data), pdf_bytes in zip(pending, pdfs):
+        file_name = invoice_filename(sale_data)
+        _cache_put(sale_id, fingerprint, file_name, pdf_bytes)
+        rendered[sale_id] = (file_name, pdf_bytes)
+
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for sale_id in sorted(rendered):
+            file_name, pdf_bytes = rendered[sale_id]
+            archive.writestr(f"{sale_id}_{file_name}", pdf_bytes)
+    return buffer.getvalue(), len(rendered)
+
+
+# --------------------------------------------------------------------------------
+# Facturas de un rango de fechas en un solo PDF (una página por venta)
+# --------------------------------------------------------------------------------
+@metrics.timed
+def invoices_pdf(start, end):
+    sales = _sales_in_range(start, end)
+    if not sales:
+        return None, 0
+    pdf = _new_pdf()
+    for _, sale_data in sales:
+        _draw_invoice(pdf, sale_data)
+    return _pdf_bytes(pdf), len(sales)
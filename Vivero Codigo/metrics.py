@@ -0,0 +1,172 @@
+import functools
+import os
+import threading
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+# Métricas de rendimiento del proceso: duración de las operaciones instrumentadas
+# con @timed, volumen de datos que mueven (filas y bytes) y contadores de eventos
+# (p. ej. aciertos de caché). Viven en la memoria del proceso, compartidas por
+# todos los hilos y sesiones: la aplicación de Streamlit y la API tienen cada una
+# las suyas. Se consultan en la página "Rendimiento" o en formato de texto de
+# Prometheus (GET /metricas en la API).
+
+# Llamadas recientes por operación con las que se calculan los percentiles
+WINDOW_SIZE = 1000
+
+_lock = threading.Lock()
+_operations = {}
+_counters = {}
+_local = threading.local()
+
+
+def _new_operation():
+    return {"llamadas": 0, "errores": 0, "segundos": 0.0, "filas": 0, "bytes": 0,
+            "recientes": deque(maxlen=WINDOW_SIZE)}
+
+
+def _volume(result):
+    # Filas de los DataFrame y bytes de los archivos generados que devuelve la operación
+    if isinstance(result, (pd.DataFrame, pd.Series)):
+        return len(result), 0
+    if isinstance(result, (bytes, bytearray)):
+        return 0, len(result)
+    if isinstance(result, tuple):
+        rows = size = 0
+        for value in result:
+            if isinstance(value, (pd.DataFrame, pd.Series, bytes, bytearray)):
+                value_rows, value_size = _volume(value)
+                rows, size = rows + value_rows, size + value_size
+        return rows, size
+    return 0, 0
+
+
+# --------------------------------------------------------------------------------
+# Decorador: mide cada llamada de la función con el nombre "módulo.función" (el
+# módulo se toma del archivo: Streamlit ejecuta app.py como __main__). El volumen
+# se toma del resultado; las escrituras lo informan con record_io().
+# --------------------------------------------------------------------------------
+def timed(function):
+    module = os.path.splitext(os.path.basename(function.__code__.co_filename))[0]
+    name = f"{module}.{function.__qualname__}"
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        io = [0, 0]
+        stack.append(io)
+        failed = True
+        begin = time.perf_counter()
+        try:
+            result = function(*args, **kwargs)
+            rows, size = _volume(result)
+            io[0] += rows
+            io[1] += size
+            failed = False
+            return result
+        finally:
+            elapsed = time.perf_counter() - begin
+            stack.pop()
+            with _lock:
+                operation = _operations.get(name)
+                if operation is None:
+                    operation = _operations[name] = _new_operation()
+                operation["llamadas"] += 1
+                operation["errores"] += failed
+                operation["segundos"] += elapsed
+                operation["filas"] += io[0]
+                operation["bytes"] += io[1]
+                operation["recientes"].append(elapsed)
+
+    return wrapper
+
+
+def record_io(rows=0, size=0):
+    # Suma filas o bytes a la operación medida que se está ejecutando en este hilo
+    stack = getattr(_local, "stack", None)
+    if stack:
+        stack[-1][0] += rows
+        stack[-1][1] += size
+
+
+def increment(name, amount=1):
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + amount
+
+
+def reset():
+    with _lock:
+        _operations.clear()
+        _counters.clear()
+
+
+def _snapshot():
+    with _lock:
+        operations = {name: {**operation, "recientes": list(operation["recientes"])}
+                      for name, operation in _operations.items()}
+        return operations, dict(_counters)
+
+
+# --------------------------------------------------------------------------------
+# Resumen por operación: percentiles de las llamadas recientes y totales
+# acumulados desde el arranque (o desde el último reset)
+# --------------------------------------------------------------------------------
+def summary():
+    operations, _ = _snapshot()
+    rows = []
+    for name, operation in sorted(operations.items()):
+        recent_ms = np.array(operation["recientes"]) * 1000
+        rows.append({
+            "Operación": name,
+            "Llamadas": operation["llamadas"],
+            "Errores": operation["errores"],
+            "p50 ms": np.percentile(recent_ms, 50),
+            "p95 ms": np.percentile(recent_ms, 95),
+            "Máx ms": recent_ms.max(),
+            "Total s": operation["segundos"],
+            "Filas": operation["filas"],
+            "Bytes": operation["bytes"],
+        })
+    return pd.DataFrame(rows, columns=["Operación", "Llamadas", "Errores", "p50 ms", "p95 ms", "Máx ms",
+                                       "Total s", "Filas", "Bytes"])
+
+
+def counters():
+    return _snapshot()[1]
+
+
+# --------------------------------------------------------------------------------
+# Exportación en el formato de texto de Prometheus
+# --------------------------------------------------------------------------------
+def prometheus_text():
+    operations, event_counts = _snapshot()
+    names = sorted(operations)
+    lines = [
+        f"# HELP vivero_operacion_segundos Duración de las operaciones (cuantiles de las últimas {WINDOW_SIZE} llamadas).",
+        "# TYPE vivero_operacion_segundos summary",
+    ]
+    for name in names:
+        operation = operations[name]
+        for quantile in (0.5, 0.95, 0.99):
+            value = np.percentile(operation["recientes"], quantile * 100)
+            lines.append(f'vivero_operacion_segundos{{operacion="{name}",quantile="{quantile}"}} {value:.6f}')
+        lines.append(f'vivero_operacion_segundos_sum{{operacion="{name}"}} {operation["segundos"]:.6f}')
+        lines.append(f'vivero_operacion_segundos_count{{operacion="{name}"}} {operation["llamadas"]}')
+
+    for metric, key, description in [
+        ("vivero_operacion_errores_total", "errores", "Llamadas que terminaron en una excepción."),
+        ("vivero_operacion_filas_total", "filas", "Filas leídas o escritas."),
+        ("vivero_operacion_bytes_total", "bytes", "Bytes de archivos leídos o generados."),
+    ]:
+        lines += [f"# HELP {metric} {description}", f"# TYPE {metric} counter"]
+        lines += [f'{metric}{{operacion="{name}"}} {operations[name][key]}' for name in names]
+
+    lines += ["# HELP vivero_eventos_total Eventos contados (aciertos y fallos de caché).",
+              "# TYPE vivero_eventos_total counter"]
+    lines += [f'vivero_eventos_total{{evento="{name}"}} {count}' for name, count in sorted(event_counts.items())]
+    return "\n".join(lines) + "\n"
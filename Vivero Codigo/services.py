@@ -0,0 +1,168 @@
+import datetime
+
+import pandas as pd
+
+import storage
+import invoices
+
+# Capa de servicios: reglas del negocio para inventario, ventas y facturas, sin
+# widgets. La usan tanto la aplicación de Streamlit como la API HTTP (api.py).
+
+CATEGORIES = list(storage.inventory_files)
+
+
+class ValidationError(Exception):
+    pass
+
+
+class NotFoundError(Exception):
+    pass
+
+
+def _check_category(category):
+    if category not in CATEGORIES:
+        raise NotFoundError(f"La categoría {category} no existe.")
+
+
+def records(frame):
+    # Filas como diccionarios con tipos nativos de Python (listos para JSON)
+    return frame.astype(object).where(frame.notna(), None).to_dict("records")
+
+
+def item_record(item):
+    # Un artículo (Series) como diccionario con tipos nativos de Python
+    return {column: None if pd.isna(value) else value.item() if hasattr(value, "item") else value
+            for column, value in item.items()}
+
+
+# --------------------------------------------------------------------------------
+# Inventario
+# --------------------------------------------------------------------------------
+def get_item(category, item_id):
+    _check_category(category)
+    item = storage.find_item(category, item_id)
+    if item is None:
+        raise NotFoundError(f"No existe el artículo {item_id} en {category}.")
+    return item
+
+
+def search_stock(category, text="", page=1, page_size=50, in_stock_only=False):
+    _check_category(category)
+    return storage.search_inventory(category, text, page, page_size, in_stock_only)
+
+
+def add_item(category, item):
+    _check_category(category)
+    if not item.get("ID") or not item.get("Nombre") or item.get("Cantidad") is None or item["Cantidad"] < 0:
+        raise ValidationError("Por favor, complete todos los campos correctamente.")
+    try:
+        storage.insert_item(category, item)
+    except ValueError as e:
+        raise ValidationError(str(e)) from None
+
+
+def update_item(category, item_id, changes, expected_quantity=None):
+    get_item(category, item_id)
+    if not changes.get("Nombre", True) or changes.get("Cantidad", 0) < 0:
+        raise ValidationError("Por favor, complete todos los campos correctamente.")
+    try:
+        storage.update_item_fields(category, item_id, changes, expected_quantity)
+    except ValueError as e:
+        raise ValidationError(str(e)) from None
+
+
+def delete_item(category, item_id):
+    get_item(category, item_id)
+    storage.delete_item_row(category, item_id)
+
+
+# --------------------------------------------------------------------------------
+# Actualización masiva de stock: [{"ID": ..., "Cantidad": ...}] con cantidades
+# absolutas, aplicada en una sola transacción. Devuelve los ID que no existen.
+# --------------------------------------------------------------------------------
+def update_stock(category, levels):
+    _check_category(category)
+    pairs = []
+    for level in levels:
+        quantity = level.get("Cantidad")
+        if level.get("ID") is None or quantity is None or int(quantity) != quantity or quantity < 0:
+            raise ValidationError(f"Cantidad inválida para el artículo {level.get('ID')}.")
+        pairs.append((level["ID"], int(quantity)))
+    updated, missing = storage.set_stock_levels(category, pairs)
+    return {"actualizados": updated, "no_encontrados": missing}
+
+
+# --------------------------------------------------------------------------------
+# Reposición de un artículo (unidades recibidas) y su historial de movimientos
+# --------------------------------------------------------------------------------
+def restock_item(category, item_id, quantity, reference=None):
+    get_item(category, item_id)
+    if quantity is None or int(quantity) != quantity or quantity <= 0:
+        raise ValidationError("La cantidad a reponer debe ser mayor que cero.")
+    return storage.restock_item(category, item_id, int(quantity), reference or None)
+
+
+def item_movements(category, item_id, limit=500):
+    get_item(category, item_id)
+    return storage.item_movements(category, item_id, limit)
+
+
+# --------------------------------------------------------------------------------
+# Registrar una venta a partir de [{"ID": ..., "Cantidad": ...}] (cada línea puede
+# indicar su "Categoria"; si no, se usa la de la venta): nombre y precio salen
+# del inventario (no del cliente) y el stock se descuenta en la misma
+# transacción que guarda la venta.
+# --------------------------------------------------------------------------------
+def sale_items(category, lines):
+    quantities = {}
+    for line in lines:
+        quantity = line.get("Cantidad")
+        if quantity is None or int(quantity) != quantity or quantity <= 0:
+            raise ValidationError(f"Cantidad inválida para el artículo {line.get('ID')}.")
+        key = (line.get("Categoria") or category, storage.canonical_id(line.get("ID")))
+        quantities[key] = quantities.get(key, 0) + int(quantity)
+
+    items = []
+    for (item_category, item_id), quantity in quantities.items():
+        item = get_item(item_category, item_id)
+        price = item.get("Precio Unitario")
+        if price is None or pd.isna(price):
+            raise ValidationError(f"El artículo {item['Nombre']} no tiene precio.")
+        items.append({
+            "Categoria": item_category,
+            "ID": item_id,
+            "Nombre": item["Nombre"],
+            "Cantidad": quantity,
+            "Precio Unitario": float(price),
+            "Total": float(price) * quantity
+        })
+    return items
+
+
+def record_sale(category, lines, customer):
+    _check_category(category)
+    if not customer:
+        raise ValidationError("Falta el nombre del cliente.")
+    if not lines:
+        raise ValidationError("La venta no tiene artículos.")
+    items = sale_items(category, lines)
+    date = datetime.datetime.now().replace(microsecond=0)
+    sale_id = storage.commit_sale(category, items, {"Fecha": date, "Cliente": customer})
+    return {
+        "Venta": sale_id,
+        "Fecha": date.strftime(storage.DATE_FORMAT),
+        "Cliente": customer,
+        "Cantidad": sum(item["Cantidad"] for item in items),
+        "Total": sum(item["Total"] for item in items),
+        "Articulos": items
+    }
+
+
+# --------------------------------------------------------------------------------
+# Facturas
+# --------------------------------------------------------------------------------
+def sale_invoice(sale_id):
+    invoice = invoices.invoice_for_sale(sale_id)
+    if invoice is None:
+        raise NotFoundError(f"No existe la venta {sale_id}.")
+    return invoice
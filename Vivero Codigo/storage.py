@@ -0,0 +1,1484 @@
+import os
+import datetime
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+import metrics
+
+# Base de datos embebida donde vive el inventario, las ventas y los usuarios.
+# Los CSV originales solo se usan como origen de la importación inicial.
+DB_FILE = "vivero.db"
+
+# Ruta para los archivos CSV de inventarios
+inventory_files = {
+    "plantas": "vivero_inventory_plants.csv",
+    "herramientas": "vivero_inventory_tools.csv",
+    "productos": "vivero_inventory_products.csv",
+    "maceteros": "vivero_inventory_pots.csv"
+}
+
+# Archivos antiguos con el mismo inventario bajo otros nombres de columnas: solo
+# aportan los artículos que todavía no existen en su categoría
+legacy_inventory_files = {
+    "vivero_inventory.csv": "plantas"
+}
+
+# Archivo para guardar los usuarios
+USER_FILE = "usuarios.csv"
+
+# Archivo para guardar las ventas
+SALES_FILE = "ventas.csv"
+
+# Formato único de fechas guardadas: ISO ordenable, así los rangos de fechas se
+# resuelven comparando texto sobre el índice sin volver a interpretar fechas.
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+INVENTORY_COLUMNS = ["ID", "Nombre", "Cantidad", "Precio Unitario", "Descripción", "Punto de Reorden"]
+# Tipos fijos del inventario: se aplican al leer y al guardar, así pandas no
+# vuelve a deducirlos en cada carga
+INVENTORY_DTYPES = {
+    "ID": "string",
+    "Nombre": "string",
+    "Cantidad": "int64",
+    "Precio Unitario": "Float64",
+    "Descripción": "string",
+    "Punto de Reorden": "Int64",
+}
+# Nombres alternativos de columnas que aparecen en archivos antiguos
+COLUMN_ALIASES = {
+    "Nombre de la Planta": "Nombre",
+    "Código": "ID",
+    "Codigo": "ID",
+    "Precio": "Precio Unitario",
+    "Descripcion": "Descripción",
+    "Stock Minimo": "Punto de Reorden",
+    "Stock Mínimo": "Punto de Reorden",
+}
+# Cabecera de la venta y sus líneas (una por artículo vendido)
+SALES_COLUMNS = ["Fecha", "Cliente", "Cantidad", "Total"]
+SALE_ITEM_COLUMNS = ["Venta", "ID", "Nombre", "Cantidad", "Precio Unitario", "Total"]
+USER_COLUMNS = ["username", "password", "role"]
+
+# Punto de reorden cuando ni el artículo ni su categoría tienen uno propio
+DEFAULT_REORDER_POINT = 10
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS inventario (
+    "Categoria" TEXT NOT NULL,
+    "ID" TEXT,
+    "Nombre" TEXT,
+    "Cantidad" INTEGER NOT NULL DEFAULT 0,
+    "Precio Unitario" REAL,
+    "Descripción" TEXT,
+    "Punto de Reorden" INTEGER,
+    "Bajo Stock" INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS ventas (
+    "Venta" INTEGER PRIMARY KEY AUTOINCREMENT,
+    "Fecha" TEXT NOT NULL,
+    "Cliente" TEXT,
+    "Cantidad" INTEGER,
+    "Total" REAL
+);
+CREATE INDEX IF NOT EXISTS ventas_fecha ON ventas ("Fecha");
+
+CREATE TABLE IF NOT EXISTS venta_items (
+    "Venta" INTEGER NOT NULL REFERENCES ventas ("Venta") ON DELETE CASCADE,
+    "Categoria" TEXT NOT NULL DEFAULT 'plantas',
+    "ID" TEXT,
+    "Nombre" TEXT NOT NULL,
+    "Cantidad" INTEGER NOT NULL,
+    "Precio Unitario" REAL NOT NULL,
+    "Total" REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS venta_items_venta ON venta_items ("Venta");
+CREATE INDEX IF NOT EXISTS venta_items_nombre ON venta_items ("Nombre");
+
+CREATE TABLE IF NOT EXISTS usuarios (
+    "username" TEXT PRIMARY KEY,
+    "password" TEXT NOT NULL,
+    "role" TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS reorden_categorias (
+    "Categoria" TEXT PRIMARY KEY,
+    "Punto de Reorden" INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS versiones (
+    "tabla" TEXT PRIMARY KEY,
+    "version" INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS importaciones (
+    "origen" TEXT PRIMARY KEY,
+    "fecha" TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS movimientos (
+    "Movimiento" INTEGER PRIMARY KEY,
+    "Fecha" TEXT NOT NULL,
+    "Categoria" TEXT NOT NULL,
+    "ID" TEXT,
+    "Nombre" TEXT,
+    "Tipo" TEXT NOT NULL,
+    "Cambio" INTEGER NOT NULL,
+    "Cantidad" INTEGER NOT NULL,
+    "Referencia" TEXT
+);
+CREATE INDEX IF NOT EXISTS movimientos_fecha ON movimientos ("Fecha");
+CREATE INDEX IF NOT EXISTS movimientos_articulo ON movimientos ("Categoria", "ID", "Movimiento");
+
+CREATE TABLE IF NOT EXISTS movimiento_contexto (
+    "id" INTEGER PRIMARY KEY CHECK ("id" = 1),
+    "Tipo" TEXT NOT NULL,
+    "Referencia" TEXT
+);
+
+CREATE TABLE IF NOT EXISTS cortes_stock (
+    "Corte" INTEGER PRIMARY KEY,
+    "Fecha" TEXT NOT NULL,
+    "Movimiento" INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS corte_stock_items (
+    "Corte" INTEGER NOT NULL REFERENCES cortes_stock ("Corte") ON DELETE CASCADE,
+    "Categoria" TEXT NOT NULL,
+    "ID" TEXT,
+    "Cantidad" INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS corte_stock_items_corte ON corte_stock_items ("Corte", "Categoria");
+
+CREATE TABLE IF NOT EXISTS exportaciones (
+    "destino" TEXT PRIMARY KEY,
+    "venta" INTEGER NOT NULL DEFAULT 0,
+    "historial" INTEGER NOT NULL DEFAULT 0,
+    "inventario" TEXT,
+    "fecha" TEXT,
+    "resultado" TEXT
+);
+"""
+
+# --------------------------------------------------------------------------------
+# Resumen diario de ventas: una fila por día y artículo (Categoria e ID; las
+# líneas antiguas sin ID, por nombre). El nombre no es parte de la clave: es el
+# más reciente del artículo, así renombrarlo no parte su historial.
+# --------------------------------------------------------------------------------
+DAILY_TOTALS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ventas_diarias (
+    "Dia" TEXT NOT NULL,
+    "Categoria" TEXT NOT NULL,
+    "ID" TEXT,
+    "Nombre" TEXT NOT NULL,
+    "Ventas" INTEGER NOT NULL DEFAULT 0,
+    "Cantidad" INTEGER NOT NULL DEFAULT 0,
+    "Total" REAL NOT NULL DEFAULT 0
+);
+CREATE UNIQUE INDEX IF NOT EXISTS ventas_diarias_articulo
+    ON ventas_diarias ("Dia", "Categoria", COALESCE("ID", "Nombre"), "ID" IS NULL);
+"""
+
+# --------------------------------------------------------------------------------
+# Alertas de stock bajo: la marca "Bajo Stock" de cada artículo la mantienen los
+# disparadores de SQLite cada vez que cambia su cantidad o su punto de reorden
+# (venta, actualización, carga masiva) o el punto de reorden de su categoría.
+# Así solo se recalculan las filas afectadas y nunca toda la tabla al mostrarla.
+# --------------------------------------------------------------------------------
+_REORDER_POINT_SQL = (
+    'COALESCE(NEW."Punto de Reorden", '
+    '(SELECT "Punto de Reorden" FROM reorden_categorias WHERE "Categoria" = NEW."Categoria"), '
+    f'{DEFAULT_REORDER_POINT})')
+
+ALERT_SCHEMA = f"""
+CREATE TRIGGER IF NOT EXISTS inventario_alerta_alta AFTER INSERT ON inventario
+BEGIN
+    UPDATE inventario SET "Bajo Stock" = (NEW."Cantidad" <= {_REORDER_POINT_SQL})
+    WHERE rowid = NEW.rowid;
+END;
+
+CREATE TRIGGER IF NOT EXISTS inventario_alerta_cambio
+AFTER UPDATE OF "Cantidad", "Punto de Reorden" ON inventario
+BEGIN
+    UPDATE inventario SET "Bajo Stock" = (NEW."Cantidad" <= {_REORDER_POINT_SQL})
+    WHERE rowid = NEW.rowid;
+END;
+
+CREATE TRIGGER IF NOT EXISTS reorden_categoria_alta AFTER INSERT ON reorden_categorias
+BEGIN
+    UPDATE inventario SET "Bajo Stock" = ("Cantidad" <= COALESCE("Punto de Reorden", NEW."Punto de Reorden"))
+    WHERE "Categoria" = NEW."Categoria";
+END;
+
+CREATE TRIGGER IF NOT EXISTS reorden_categoria_cambio AFTER UPDATE ON reorden_categorias
+BEGIN
+    UPDATE inventario SET "Bajo Stock" = ("Cantidad" <= COALESCE("Punto de Reorden", NEW."Punto de Reorden"))
+    WHERE "Categoria" = NEW."Categoria";
+END;
+
+CREATE TRIGGER IF NOT EXISTS reorden_categoria_baja AFTER DELETE ON reorden_categorias
+BEGIN
+    UPDATE inventario SET "Bajo Stock" = ("Cantidad" <= COALESCE("Punto de Reorden", {DEFAULT_REORDER_POINT}))
+    WHERE "Categoria" = OLD."Categoria";
+END;
+
+CREATE INDEX IF NOT EXISTS inventario_bajo_stock ON inventario ("Categoria") WHERE "Bajo Stock" = 1;
+"""
+
+# --------------------------------------------------------------------------------
+# Libro de movimientos: cada cambio de la cantidad de un artículo queda como un
+# movimiento (cambio y cantidad resultante). Lo escriben los disparadores, así
+# ninguna escritura se lo salta; el tipo y la referencia (p. ej. el ID de la
+# venta) los fija quien escribe en movimiento_contexto dentro de su transacción.
+# --------------------------------------------------------------------------------
+MOVEMENT_TYPES = ["venta", "reposicion", "ajuste", "importacion", "alta", "baja"]
+
+# Cortes de stock: una copia de las cantidades cuando los movimientos desde el
+# último corte igualan al número de artículos (y al menos este mínimo). Así
+# reconstruir el stock de una fecha nunca reproduce más movimientos que artículos
+# hay, y los cortes no ocupan más que el propio libro.
+SNAPSHOT_MIN_MOVEMENTS = 10000
+
+_MOVEMENT_SQL = """
+    INSERT INTO movimientos ("Fecha", "Categoria", "ID", "Nombre", "Tipo", "Cambio", "Cantidad", "Referencia")
+    VALUES (datetime('now', 'localtime'), {row}."Categoria", {row}."ID", {row}."Nombre",
+            COALESCE((SELECT "Tipo" FROM movimiento_contexto), 'ajuste'), {change}, {quantity},
+            (SELECT "Referencia" FROM movimiento_contexto));
+"""
+
+LEDGER_SCHEMA = f"""
+CREATE TRIGGER IF NOT EXISTS inventario_movimiento_alta AFTER INSERT ON inventario
+WHEN NEW."Cantidad" <> 0
+BEGIN
+    {_MOVEMENT_SQL.format(row="NEW", change='NEW."Cantidad"', quantity='NEW."Cantidad"')}
+END;
+
+CREATE TRIGGER IF NOT EXISTS inventario_movimiento_cambio AFTER UPDATE OF "Cantidad" ON inventario
+WHEN NEW."Cantidad" IS NOT OLD."Cantidad"
+BEGIN
+    {_MOVEMENT_SQL.format(row="NEW", change='NEW."Cantidad" - OLD."Cantidad"', quantity='NEW."Cantidad"')}
+END;
+
+CREATE TRIGGER IF NOT EXISTS inventario_movimiento_baja AFTER DELETE ON inventario
+WHEN OLD."Cantidad" <> 0
+BEGIN
+    {_MOVEMENT_SQL.format(row="OLD", change='-OLD."Cantidad"', quantity="0")}
+END;
+"""
+
+
+class DuplicateItemError(Exception):
+    def __init__(self, item_id):
+        super().__init__(f"Ya existe un artículo con el ID {item_id}.")
+        self.item_id = item_id
+
+
+class InsufficientStockError(Exception):
+    def __init__(self, name, requested):
+        super().__init__(f"No hay suficiente stock de {name} para vender {requested}.")
+        self.name = name
+        self.requested = requested
+
+
+class StockChangedError(Exception):
+    def __init__(self, name, expected, current):
+        super().__init__(f"El stock de {name} cambió mientras se editaba (se mostraba {expected}, "
+                         f"ahora hay {current}). Revisa la cantidad y vuelve a guardar.")
+        self.name = name
+        self.expected = expected
+        self.current = current
+
+
+_local = threading.local()
+_init_lock = threading.Lock()
+_initialized = False
+
+# Caché compartida por todo el proceso: {clave: (version, valor)}
+_cache = {}
+
+
+# --------------------------------------------------------------------------------
+# ID canónico: siempre texto y sin ceros a la izquierda en los códigos numéricos,
+# así 2, "2", "0002" y 2.0 identifican al mismo artículo.
+# --------------------------------------------------------------------------------
+def canonical_id(value):
+    if value is None or value is pd.NA or (isinstance(value, float) and value != value):
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    text = str(value).strip()
+    if text.endswith(".0") and _is_numeric_code(text[:-2]):
+        text = text[:-2]
+    if _is_numeric_code(text):
+        text = str(int(text))
+    return text or None
+
+
+# Solo dígitos ASCII: isdigit() también acepta "²" o "①", que int() no convierte
+def _is_numeric_code(text):
+    return text.isascii() and text.isdecimal()
+
+
+def _quote(column):
+    return '"' + column.replace('"', '""') + '"'
+
+
+def _to_db(value):
+    # sqlite3 no sabe enlazar escalares de numpy (p. ej. numpy.int64) ni pd.NA
+    if value is pd.NA:
+        return None
+    if hasattr(value, "item"):
+        value = value.item()
+    if isinstance(value, float) and value != value:
+        return None
+    return value
+
+
+def normalize_columns(df):
+    df = df.rename(columns=lambda c: COLUMN_ALIASES.get(str(c).strip(), str(c).strip()))
+    return df[[c for c in df.columns if c in INVENTORY_COLUMNS]]
+
+
+# --------------------------------------------------------------------------------
+# Aplica los tipos del inventario a las columnas presentes. Cantidades y puntos
+# de reorden deben ser enteros >= 0 y los precios números >= 0 (a dos decimales).
+# --------------------------------------------------------------------------------
+def coerce_inventory(df):
+    df = df.copy()
+    for column in ["Cantidad", "Punto de Reorden"]:
+        if column in df.columns:
+            values = pd.to_numeric(df[column], errors="coerce")
+            if (df[column].notna() & (values.isna() | (values < 0) | (values % 1 != 0))).any():
+                raise ValueError(f"{column} debe ser un entero mayor o igual a 0.")
+            df[column] = values
+    if "Precio Unitario" in df.columns:
+        values = pd.to_numeric(df["Precio Unitario"], errors="coerce")
+        if (df["Precio Unitario"].notna() & (values.isna() | (values < 0))).any():
+            raise ValueError("Precio Unitario debe ser un número mayor o igual a 0.")
+        df["Precio Unitario"] = values.round(2)
+    if "ID" in df.columns:
+        df["ID"] = df["ID"].map(canonical_id)
+    # Una cantidad vacía se deja sin valor: al insertar vale 0 y al fusionar por ID
+    # conserva la cantidad existente
+    dtypes = {**INVENTORY_DTYPES, "Cantidad": "Int64"}
+    return df.astype({c: t for c, t in dtypes.items() if c in df.columns})
+
+
+# --------------------------------------------------------------------------------
+# Conexión por hilo (cada sesión de Streamlit corre en su propio hilo)
+# --------------------------------------------------------------------------------
+def get_connection():
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(DB_FILE, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        _local.conn = conn
+        _ensure_schema(conn)
+    return conn
+
+
+def _ensure_schema(conn):
+    global _initialized
+    with _init_lock:
+        if _initialized:
+            return
+        conn.executescript(SCHEMA)
+        _migrate_legacy_sales(conn)
+        _migrate_inventory_ids(conn)
+        _migrate_reorder_points(conn)
+        import_csv_files(conn)
+        _migrate_daily_totals(conn)
+        _backfill_daily_totals(conn)
+        _migrate_stock_ledger(conn)
+        _migrate_movement_names(conn)
+        _initialized = True
+
+
+# --------------------------------------------------------------------------------
+# Transacción explícita: todo o nada
+# --------------------------------------------------------------------------------
+@contextmanager
+def transaction():
+    conn = get_connection()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+# --------------------------------------------------------------------------------
+# Transacción que cambia cantidades del inventario: los movimientos que anoten
+# los disparadores llevan el tipo `kind` y la referencia dada. Al terminar se
+# toma un corte de stock si ya corresponde.
+# --------------------------------------------------------------------------------
+def _set_movement(conn, kind, reference=None):
+    conn.execute('INSERT OR REPLACE INTO movimiento_contexto ("id", "Tipo", "Referencia") VALUES (1, ?, ?)',
+                 (kind, None if reference is None else str(reference)))
+
+
+@contextmanager
+def stock_transaction(kind, reference=None):
+    with transaction() as conn:
+        _set_movement(conn, kind, reference)
+        yield conn
+        conn.execute("DELETE FROM movimiento_contexto")
+    _maybe_snapshot()
+
+
+# --------------------------------------------------------------------------------
+# Caché de lecturas con invalidación por versión
+# Cada escritura incrementa la versión de la tabla afectada dentro de su propia
+# transacción; las lecturas solo vuelven a consultar la base de datos cuando la
+# versión guardada en la caché ya no coincide. Al vivir la versión en la base de
+# datos, también se invalidan las escrituras hechas por otros procesos.
+# --------------------------------------------------------------------------------
+def _bump_version(conn, key):
+    conn.execute(
+        "INSERT INTO versiones (tabla, version) VALUES (?, 1) "
+        "ON CONFLICT(tabla) DO UPDATE SET version = version + 1",
+        (key,))
+
+
+def _current_version(key):
+    row = get_connection().execute("SELECT version FROM versiones WHERE tabla = ?", (key,)).fetchone()
+    return row[0] if row else 0
+
+
+def _cached(key, loader, version_key=None):
+    version = _current_version(version_key or key)
+    entry = _cache.get(key)
+    table = key.split(":")[0]
+    if entry is None or entry[0] != version:
+        metrics.increment(f"cache.{table}.fallo")
+        entry = (version, loader())
+        _cache[key] = entry
+    else:
+        metrics.increment(f"cache.{table}.acierto")
+    return entry[1]
+
+
+def clear_cache():
+    _cache.clear()
+
+
+# --------------------------------------------------------------------------------
+# Cambia el archivo de la base de datos (p. ej. para pruebas de rendimiento).
+# Solo cierra la conexión del hilo actual: usar antes de abrir otros hilos.
+# --------------------------------------------------------------------------------
+def set_database(path):
+    global DB_FILE, _initialized
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        conn.close()
+        _local.conn = None
+    with _init_lock:
+        DB_FILE = path
+        _initialized = False
+    clear_cache()
+
+
+# --------------------------------------------------------------------------------
+# Importación única de los CSV existentes a la base de datos
+# --------------------------------------------------------------------------------
+def _already_imported(conn, origin):
+    row = conn.execute("SELECT 1 FROM importaciones WHERE origen = ?", (origin,)).fetchone()
+    return row is not None
+
+
+def _insert_rows(conn, table, df, on_conflict=None):
+    if df.empty:
+        return
+    columns = ", ".join(_quote(c) for c in df.columns)
+    placeholders = ", ".join("?" for _ in df.columns)
+    rows = ([_to_db(v) for v in row]
+            for row in df.astype(object).where(df.notna(), None).itertuples(index=False, name=None))
+    verb = f"INSERT OR {on_conflict}" if on_conflict else "INSERT"
+    conn.executemany(f"{verb} INTO {table} ({columns}) VALUES ({placeholders})", rows)
+
+
+# --------------------------------------------------------------------------------
+# Pasa los ID existentes a su forma canónica y crea el índice único por
+# categoría. Si dos artículos quedan con el mismo ID, el repetido conserva sus
+# datos con un sufijo ("2-1") para que el administrador lo revise.
+# --------------------------------------------------------------------------------
+def _migrate_inventory_ids(conn):
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'inventario_id_unico'").fetchone()
+    if exists:
+        return
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        seen = set()
+        for rowid, category, item_id in conn.execute(
+                'SELECT rowid, "Categoria", "ID" FROM inventario ORDER BY rowid').fetchall():
+            new_id = canonical_id(item_id)
+            if new_id is not None:
+                base, suffix = new_id, 0
+                while (category, new_id) in seen:
+                    suffix += 1
+                    new_id = f"{base}-{suffix}"
+                seen.add((category, new_id))
+            if new_id != item_id:
+                conn.execute('UPDATE inventario SET "ID" = ? WHERE rowid = ?', (new_id, rowid))
+        conn.execute("DROP INDEX IF EXISTS inventario_categoria_id")
+        conn.execute('CREATE UNIQUE INDEX inventario_id_unico ON inventario ("Categoria", "ID")')
+        conn.execute('CREATE INDEX IF NOT EXISTS inventario_nombre ON inventario ("Categoria", "Nombre")')
+        for (category,) in conn.execute("SELECT DISTINCT Categoria FROM inventario").fetchall():
+            _bump_version(conn, f"inventario:{category}")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+# --------------------------------------------------------------------------------
+# Bases de datos anteriores a las alertas: agrega el punto de reorden, la marca de
+# stock bajo y la categoría de cada línea de venta (todas eran plantas), crea los
+# disparadores y calcula la marca una única vez para el inventario existente.
+# --------------------------------------------------------------------------------
+def _migrate_reorder_points(conn):
+    inventory_columns = [row[1] for row in conn.execute("PRAGMA table_info(inventario)")]
+    item_columns = [row[1] for row in conn.execute("PRAGMA table_info(venta_items)")]
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        if "Categoria" not in item_columns:
+            conn.execute("ALTER TABLE venta_items ADD COLUMN \"Categoria\" TEXT NOT NULL DEFAULT 'plantas'")
+        if "Bajo Stock" not in inventory_columns:
+            conn.execute('ALTER TABLE inventario ADD COLUMN "Punto de Reorden" INTEGER')
+            conn.execute('ALTER TABLE inventario ADD COLUMN "Bajo Stock" INTEGER NOT NULL DEFAULT 0')
+            conn.execute(f'UPDATE inventario SET "Bajo Stock" = ("Cantidad" <= {DEFAULT_REORDER_POINT})')
+            for (category,) in conn.execute("SELECT DISTINCT Categoria FROM inventario").fetchall():
+                _bump_version(conn, f"inventario:{category}")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+    conn.executescript(ALERT_SCHEMA)
+
+
+# --------------------------------------------------------------------------------
+# Bases de datos anteriores al libro de movimientos: el stock existente entra
+# como un corte de apertura y desde ahí los disparadores anotan cada cambio.
+# --------------------------------------------------------------------------------
+def _migrate_stock_ledger(conn):
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'inventario_movimiento_cambio'").fetchone()
+    if exists:
+        return
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        if conn.execute("SELECT 1 FROM cortes_stock").fetchone() is None:
+            _insert_snapshot(conn)
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+    conn.executescript(LEDGER_SCHEMA)
+
+
+# --------------------------------------------------------------------------------
+# Libros de movimientos sin el nombre del artículo: se agrega la columna, se
+# completa con los artículos que siguen en el inventario y se recrean los
+# disparadores para que lo anoten. Así un artículo eliminado conserva su nombre
+# en la auditoría.
+# --------------------------------------------------------------------------------
+def _migrate_movement_names(conn):
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(movimientos)")]
+    if "Nombre" in columns:
+        return
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute('ALTER TABLE movimientos ADD COLUMN "Nombre" TEXT')
+        conn.execute(
+            'UPDATE movimientos SET "Nombre" = (SELECT i."Nombre" FROM inventario i '
+            'WHERE i."Categoria" = movimientos."Categoria" AND i."ID" = movimientos."ID")')
+        for trigger in ("inventario_movimiento_alta", "inventario_movimiento_cambio", "inventario_movimiento_baja"):
+            conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+    conn.executescript(LEDGER_SCHEMA)
+
+
+@metrics.timed
+def _read_inventory_csv(category, file_path):
+    inventory = normalize_columns(pd.read_csv(file_path, dtype={"ID": str}))
+    inventory = coerce_inventory(inventory.reindex(columns=INVENTORY_COLUMNS))
+    inventory = inventory.assign(Cantidad=inventory["Cantidad"].fillna(0)).drop_duplicates("ID", keep="last")
+    inventory.insert(0, "Categoria", category)
+    return inventory
+
+
+def _import_inventory_csv(conn, category, file_path, on_conflict=None):
+    _set_movement(conn, "importacion", file_path)
+    _insert_rows(conn, "inventario", _read_inventory_csv(category, file_path), on_conflict=on_conflict)
+    conn.execute("DELETE FROM movimiento_contexto")
+
+
+def _import_legacy_inventory_csv(conn, category, file_path):
+    _import_inventory_csv(conn, category, file_path, on_conflict="IGNORE")
+
+
+# --------------------------------------------------------------------------------
+# Migración del formato antiguo de ventas: una fila por venta con "Plantas" y
+# "Precio Unitario" unidos por comas y la "Cantidad" sumada. Se reconstruyen las
+# líneas buscando las cantidades enteras que cuadran con el total de la venta.
+# --------------------------------------------------------------------------------
+# Límites de la búsqueda exacta (corre dentro de la transacción de la migración):
+# con más líneas o unidades, o al agotar los pasos, se usa el reparto aproximado
+LEGACY_SPLIT_MAX_LINES = 8
+LEGACY_SPLIT_MAX_UNITS = 200
+LEGACY_SPLIT_MAX_STEPS = 20000
+
+
+def _exact_legacy_split(cents, quantity, total):
+    # Montos en centavos. Se poda cuando el monto restante no se alcanza con las
+    # unidades que quedan (a los precios mínimo y máximo de las líneas que faltan)
+    # y se recuerdan los estados sin solución.
+    low = [min(cents[i:]) for i in range(len(cents))]
+    high = [max(cents[i:]) for i in range(len(cents))]
+    failed = set()
+    steps = 0
+
+    def search(index, remaining, amount):
+        nonlocal steps
+        steps += 1
+        if steps > LEGACY_SPLIT_MAX_STEPS:
+            raise StopIteration
+        if not remaining * low[index] <= amount <= remaining * high[index]:
+            return None
+        if index == len(cents) - 1:
+            return [remaining] if remaining * cents[index] == amount else None
+        if (index, remaining, amount) in failed:
+            return None
+        for q in range(1, remaining - (len(cents) - index - 1) + 1):
+            rest = search(index + 1, remaining - q, amount - q * cents[index])
+            if rest is not None:
+                return [q] + rest
+        failed.add((index, remaining, amount))
+        return None
+
+    try:
+        return search(0, quantity, total)
+    except StopIteration:
+        return None
+
+
+def _split_legacy_quantities(prices, quantity, total):
+    if len(prices) == 1:
+        return [quantity]
+    if len(prices) <= min(quantity, LEGACY_SPLIT_MAX_LINES) and quantity <= LEGACY_SPLIT_MAX_UNITS:
+        found = _exact_legacy_split([round(p * 100) for p in prices], quantity, round(total * 100))
+        if found is not None:
+            return found
+    # Sin solución exacta: una unidad por planta y el resto en la primera línea
+    return [max(quantity - len(prices) + 1, 1)] + [1] * (len(prices) - 1)
+
+
+def _legacy_sale_items(plants, prices, quantity, total, plant_ids):
+    names = [n.strip() for n in str(plants).split(",") if n.strip()] if pd.notna(plants) else []
+    if not names:
+        return []
+    unit_prices = [float(p) for p in str(prices).split(",")] if pd.notna(prices) else []
+    if len(unit_prices) != len(names):
+        unit_prices = [float(total) / max(int(quantity), 1)] * len(names)
+    quantities = _split_legacy_quantities(unit_prices, int(quantity), float(total))
+    items = [
+        {"ID": plant_ids.get(name), "Nombre": name, "Cantidad": q,
+         "Precio Unitario": price, "Total": q * price}
+        for name, q, price in zip(names, quantities, unit_prices)
+    ]
+    # Sin reparto exacto (o por redondeo) la diferencia va a la primera línea:
+    # las líneas siempre suman el total de la venta
+    items[0]["Total"] += float(total) - sum(item["Total"] for item in items)
+    return items
+
+
+def _plant_ids(conn):
+    return dict(conn.execute("SELECT Nombre, ID FROM inventario WHERE Categoria = 'plantas'").fetchall())
+
+
+def _insert_sale_items(conn, sale_id, items, category="plantas"):
+    conn.executemany(
+        'INSERT INTO venta_items ("Venta", "Categoria", "ID", "Nombre", "Cantidad", "Precio Unitario", "Total") '
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [(sale_id, i.get("Categoria") or category, canonical_id(_to_db(i.get("ID"))), i["Nombre"], int(i["Cantidad"]),
+          float(i["Precio Unitario"]), float(i["Total"])) for i in items])
+
+
+def _migrate_legacy_sales(conn):
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(ventas)")]
+    if "Plantas" not in columns:
+        return
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        plant_ids = _plant_ids(conn)
+        legacy = conn.execute(
+            'SELECT "Venta", "Plantas", "Precio Unitario", "Cantidad", "Total" FROM ventas').fetchall()
+        for sale_id, plants, prices, quantity, total in legacy:
+            _insert_sale_items(conn, sale_id, _legacy_sale_items(plants, prices, quantity, total, plant_ids))
+        conn.execute('ALTER TABLE ventas DROP COLUMN "Plantas"')
+        conn.execute('ALTER TABLE ventas DROP COLUMN "Precio Unitario"')
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+def _import_sales_csv(conn, file_path):
+    sales = pd.read_csv(file_path, dtype={"Precio Unitario": str})
+    sales["Fecha"] = pd.to_datetime(sales["Fecha"]).dt.strftime(DATE_FORMAT)
+    plant_ids = _plant_ids(conn)
+    for row in sales.to_dict("records"):
+        header = {c: row.get(c) for c in SALES_COLUMNS}
+        sale_id = _insert_sale(conn, header)
+        items = _legacy_sale_items(row.get("Plantas"), row.get("Precio Unitario"),
+                                   row["Cantidad"], row["Total"], plant_ids)
+        _insert_sale_items(conn, sale_id, items)
+
+
+def _import_users_csv(conn, file_path):
+    users = pd.read_csv(file_path).reindex(columns=USER_COLUMNS)
+    _insert_rows(conn, "usuarios", users)
+
+
+def import_csv_files(conn):
+    sources = [(path, lambda c, p, cat=cat: _import_inventory_csv(c, cat, p))
+               for cat, path in inventory_files.items()]
+    sources += [(path, lambda c, p, cat=cat: _import_legacy_inventory_csv(c, cat, p))
+                for path, cat in legacy_inventory_files.items()]
+    sources.append((SALES_FILE, _import_sales_csv))
+    sources.append((USER_FILE, _import_users_csv))
+
+    for file_path, importer in sources:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if not _already_imported(conn, file_path):
+                if os.path.exists(file_path):
+                    importer(conn, file_path)
+                conn.execute("INSERT INTO importaciones (origen) VALUES (?)", (file_path,))
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+
+# --------------------------------------------------------------------------------
+# Inventario: una sola tabla para las cuatro categorías, con las mismas columnas
+# y los mismos tipos (INVENTORY_DTYPES) para todas
+# --------------------------------------------------------------------------------
+_INVENTORY_SELECT = ", ".join(_quote(c) for c in [*INVENTORY_COLUMNS, "Bajo Stock"])
+_READ_DTYPES = {**INVENTORY_DTYPES, "Bajo Stock": "bool"}
+
+
+def _read_inventory_sql(sql, params, with_category=False):
+    select = f'"Categoria", {_INVENTORY_SELECT}' if with_category else _INVENTORY_SELECT
+    return pd.read_sql_query(sql.format(select=select), get_connection(), params=params,
+                             dtype={"Categoria": "string", **_READ_DTYPES} if with_category else _READ_DTYPES)
+
+
+def _by_id(inventory):
+    return inventory.set_index("ID", drop=False).rename_axis(None)
+
+
+# --------------------------------------------------------------------------------
+# Inventario completo de una categoría indexado por ID (exportaciones). Las
+# páginas no leen la categoría entera: usan search_inventory y find_item.
+# --------------------------------------------------------------------------------
+@metrics.timed
+def read_inventory(category):
+    return _by_id(_read_inventory_sql(
+        "SELECT {select} FROM inventario WHERE Categoria = ? ORDER BY rowid", (category,)))
+
+
+# --------------------------------------------------------------------------------
+# Inventario de todas las categorías en un solo DataFrame (columna Categoria)
+# --------------------------------------------------------------------------------
+@metrics.timed
+def read_all_inventory():
+    frames = [read_inventory(category).assign(Categoria=category) for category in inventory_files]
+    inventory = pd.concat(frames, ignore_index=True)
+    return inventory[["Categoria", *INVENTORY_COLUMNS, "Bajo Stock"]].astype({"Categoria": "string"})
+
+
+# --------------------------------------------------------------------------------
+# Un artículo por ID (índice único de Categoria e ID) o por nombre (índice de
+# Categoria y Nombre; el primero agregado si hay varios). Se consulta solo esa fila.
+# --------------------------------------------------------------------------------
+_ITEM_COLUMNS = [*INVENTORY_COLUMNS, "Bajo Stock"]
+
+
+@metrics.timed
+def find_item(category, item_id=None, name=None):
+    if item_id is None:
+        condition, key = "Nombre = ?", name
+    else:
+        condition, key = "ID = ?", canonical_id(item_id)
+    if key is None:
+        return None
+    row = get_connection().execute(
+        f"SELECT {_INVENTORY_SELECT} FROM inventario WHERE Categoria = ? AND {condition} ORDER BY rowid LIMIT 1",
+        (category, key)).fetchone()
+    if row is None:
+        return None
+    item = pd.Series(row, index=_ITEM_COLUMNS, name=row[0], dtype=object)
+    item["Bajo Stock"] = bool(item["Bajo Stock"])
+    return item
+
+
+# --------------------------------------------------------------------------------
+# Búsqueda paginada: filtra por ID o Nombre en la base de datos y devuelve solo
+# la página pedida (indexada por ID) junto con el total de coincidencias.
+# --------------------------------------------------------------------------------
+@metrics.timed
+def search_inventory(category, text="", page=1, page_size=50, in_stock_only=False):
+    conditions = ["Categoria = ?"]
+    params = [category]
+    text = (text or "").strip()
+    if text:
+        pattern = "%" + text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        conditions.append("(Nombre LIKE ? ESCAPE '\\' OR ID LIKE ? ESCAPE '\\')")
+        params += [pattern, pattern]
+    if in_stock_only:
+        conditions.append("Cantidad > 0")
+    where = " AND ".join(conditions)
+
+    conn = get_connection()
+    total = conn.execute(f"SELECT COUNT(*) FROM inventario WHERE {where}", params).fetchone()[0]
+    page_frame = _read_inventory_sql(
+        f"SELECT {{select}} FROM inventario WHERE {where} ORDER BY rowid LIMIT ? OFFSET ?",
+        [*params, int(page_size), (max(int(page), 1) - 1) * int(page_size)])
+    return _by_id(page_frame), total
+
+
+@metrics.timed
+def replace_inventory(inventory, category):
+    inventory = coerce_inventory(inventory.reindex(columns=[c for c in INVENTORY_COLUMNS if c in inventory.columns]))
+    if "Cantidad" in inventory.columns:
+        inventory["Cantidad"] = inventory["Cantidad"].fillna(0)
+    inventory = inventory.assign(Categoria=category).drop_duplicates("ID", keep="last")
+    metrics.record_io(rows=len(inventory))
+    with stock_transaction("importacion") as conn:
+        conn.execute("DELETE FROM inventario WHERE Categoria = ?", (category,))
+        _insert_rows(conn, "inventario", inventory)
+        _bump_version(conn, f"inventario:{category}")
+
+
+# --------------------------------------------------------------------------------
+# Carga masiva: recibe los bloques ya validados y los fusiona por ID (actualiza
+# los existentes, inserta los nuevos) dentro de una sola transacción, así una
+# importación a medias nunca queda aplicada. Con replace=True primero se vacía
+# la categoría. Las columnas o celdas que no vienen en el archivo no se tocan.
+# --------------------------------------------------------------------------------
+@metrics.timed
+def upsert_inventory(category, chunks, replace=False):
+    inserted = updated = 0
+    with stock_transaction("importacion") as conn:
+        if replace:
+            conn.execute("DELETE FROM inventario WHERE Categoria = ?", (category,))
+        for chunk in chunks:
+            chunk = coerce_inventory(chunk)
+            columns = [c for c in INVENTORY_COLUMNS if c in chunk.columns and c != "ID"]
+            assignments = ", ".join(f"{_quote(c)} = COALESCE(?, {_quote(c)})" for c in columns)
+            update_sql = f"UPDATE inventario SET {assignments} WHERE Categoria = ? AND ID = ?"
+            insert_columns = ", ".join(_quote(c) for c in ["Categoria", "ID", *columns])
+            insert_sql = (f"INSERT INTO inventario ({insert_columns}) "
+                          f"VALUES ({', '.join('?' for _ in range(len(columns) + 2))})")
+            values = chunk[["ID", *columns]].astype(object).where(chunk[["ID", *columns]].notna(), None)
+            quantity_position = columns.index("Cantidad") if "Cantidad" in columns else None
+            for item_id, *row in values.itertuples(index=False, name=None):
+                item_id = canonical_id(item_id)
+                row = [_to_db(v) for v in row]
+                if conn.execute(update_sql, [*row, category, item_id]).rowcount:
+                    updated += 1
+                    continue
+                if quantity_position is not None and row[quantity_position] is None:
+                    row[quantity_position] = 0
+                conn.execute(insert_sql, [category, item_id, *row])
+                inserted += 1
+        _bump_version(conn, f"inventario:{category}")
+    metrics.record_io(rows=inserted + updated)
+    return inserted, updated
+
+
+def _coerce_fields(fields):
+    row = coerce_inventory(pd.DataFrame([fields]))
+    return {c: _to_db(v) if pd.notna(v) else None for c, v in row.iloc[0].items()}
+
+
+def insert_item(category, item):
+    row = _coerce_fields({c: item.get(c) for c in INVENTORY_COLUMNS if c in item})
+    row["Cantidad"] = row.get("Cantidad") or 0
+    row["Categoria"] = category
+    columns = ", ".join(_quote(c) for c in row)
+    placeholders = ", ".join("?" for _ in row)
+    try:
+        with stock_transaction("alta") as conn:
+            conn.execute(f"INSERT INTO inventario ({columns}) VALUES ({placeholders})",
+                         [_to_db(v) for v in row.values()])
+            _bump_version(conn, f"inventario:{category}")
+    except sqlite3.IntegrityError:
+        raise DuplicateItemError(row["ID"]) from None
+
+
+# --------------------------------------------------------------------------------
+# Actualiza campos de un artículo. Si cambia la Cantidad (un valor absoluto), solo
+# se aplica si el stock sigue siendo `expected_quantity`, el que vio quien editó:
+# así un formulario viejo no deshace las ventas hechas mientras estaba abierto.
+# --------------------------------------------------------------------------------
+def update_item_fields(category, item_id, changes, expected_quantity=None):
+    changes = _coerce_fields({c: v for c, v in changes.items() if c in INVENTORY_COLUMNS})
+    assignments = ", ".join(f"{_quote(c)} = ?" for c in changes)
+    item_id = canonical_id(item_id)
+    condition, params = "", []
+    if "Cantidad" in changes and expected_quantity is not None:
+        condition, params = " AND Cantidad = ?", [int(expected_quantity)]
+    with stock_transaction("ajuste") as conn:
+        cursor = conn.execute(
+            f"UPDATE inventario SET {assignments} WHERE Categoria = ? AND ID = ?{condition}",
+            [*(_to_db(v) for v in changes.values()), category, item_id, *params])
+        if cursor.rowcount == 0 and condition:
+            row = conn.execute("SELECT Nombre, Cantidad FROM inventario WHERE Categoria = ? AND ID = ?",
+                               (category, item_id)).fetchone()
+            if row is not None:
+                raise StockChangedError(row[0], int(expected_quantity), row[1])
+        _bump_version(conn, f"inventario:{category}")
+
+
+# --------------------------------------------------------------------------------
+# Fija la cantidad de varios artículos en una sola transacción. Devuelve cuántos
+# se actualizaron y los ID que no existen en la categoría.
+# --------------------------------------------------------------------------------
+@metrics.timed
+def set_stock_levels(category, levels):
+    updated, missing = 0, []
+    with stock_transaction("ajuste") as conn:
+        for item_id, quantity in levels:
+            item_id = canonical_id(item_id)
+            cursor = conn.execute("UPDATE inventario SET Cantidad = ? WHERE Categoria = ? AND ID = ?",
+                                  (int(quantity), category, item_id))
+            if cursor.rowcount:
+                updated += 1
+            else:
+                missing.append(item_id)
+        if updated:
+            _bump_version(conn, f"inventario:{category}")
+    metrics.record_io(rows=updated)
+    return updated, missing
+
+
+def delete_item_row(category, item_id):
+    with stock_transaction("baja") as conn:
+        conn.execute("DELETE FROM inventario WHERE Categoria = ? AND ID = ?", (category, canonical_id(item_id)))
+        _bump_version(conn, f"inventario:{category}")
+
+
+# --------------------------------------------------------------------------------
+# Ventas
+# --------------------------------------------------------------------------------
+@metrics.timed
+def read_sale_items(sale_ids):
+    select = ", ".join(_quote(c) for c in SALE_ITEM_COLUMNS)
+    sale_ids = [int(i) for i in sale_ids]
+    placeholders = ", ".join("?" for _ in sale_ids)
+    return pd.read_sql_query(
+        f"SELECT {select} FROM venta_items WHERE Venta IN ({placeholders}) ORDER BY Venta, rowid",
+        get_connection(), params=sale_ids)
+
+
+# --------------------------------------------------------------------------------
+# Líneas de venta de un rango de fechas, con la fecha de su venta
+# --------------------------------------------------------------------------------
+@metrics.timed
+def read_sale_items_between(start, end):
+    select = ", ".join(f"i.{_quote(c)}" for c in [*SALE_ITEM_COLUMNS[:1], "Categoria", *SALE_ITEM_COLUMNS[1:]])
+    return pd.read_sql_query(
+        f"SELECT v.Fecha, {select} FROM venta_items i JOIN ventas v ON v.Venta = i.Venta "
+        "WHERE v.Fecha >= ? AND v.Fecha < ? ORDER BY v.Fecha, i.rowid",
+        get_connection(), params=(_format_date(start), _format_date(end)))
+
+
+def _format_date(value):
+    if isinstance(value, str):
+        value = datetime.datetime.fromisoformat(value)
+    elif not isinstance(value, datetime.datetime):
+        value = datetime.datetime.combine(value, datetime.time())
+    return value.strftime(DATE_FORMAT)
+
+
+# --------------------------------------------------------------------------------
+# Ventas en un rango de fechas [start, end): solo recorre las filas del rango
+# gracias al índice sobre Fecha. El índice del DataFrame es el ID de la venta.
+# --------------------------------------------------------------------------------
+@metrics.timed
+def read_sales_between(start, end):
+    select = ", ".join(_quote(c) for c in ["Venta", *SALES_COLUMNS])
+    return pd.read_sql_query(
+        f"SELECT {select} FROM ventas WHERE Fecha >= ? AND Fecha < ? ORDER BY Fecha",
+        get_connection(), params=(_format_date(start), _format_date(end)), index_col="Venta")
+
+
+def read_sales_on(day):
+    return read_sales_between(day, day + datetime.timedelta(days=1))
+
+
+def read_sale(sale_id):
+    select = ", ".join(_quote(c) for c in ["Venta", *SALES_COLUMNS])
+    sale = pd.read_sql_query(f"SELECT {select} FROM ventas WHERE Venta = ?",
+                             get_connection(), params=(int(sale_id),), index_col="Venta")
+    return None if sale.empty else sale.iloc[0]
+
+
+# --------------------------------------------------------------------------------
+# Reemplaza el historial completo: `sales` indexado por Venta y sus líneas
+# --------------------------------------------------------------------------------
+@metrics.timed
+def replace_sales(sales, items):
+    sales = sales.rename_axis("Venta").reset_index()
+    sales = sales.reindex(columns=["Venta", *[c for c in SALES_COLUMNS if c in sales.columns]])
+    if "Fecha" in sales.columns:
+        sales = sales.assign(Fecha=pd.to_datetime(sales["Fecha"]).dt.strftime(DATE_FORMAT))
+    items = items.reindex(columns=SALE_ITEM_COLUMNS)
+    metrics.record_io(rows=len(sales) + len(items))
+    with transaction() as conn:
+        conn.execute("DELETE FROM venta_items")
+        conn.execute("DELETE FROM ventas")
+        _insert_rows(conn, "ventas", sales)
+        _insert_rows(conn, "venta_items", items)
+        # Las exportaciones incrementales empiezan de cero con un historial nuevo
+        _bump_version(conn, "historial_ventas")
+        _rebuild_daily_totals(conn)
+
+
+# --------------------------------------------------------------------------------
+# Registrar una venta como una sola unidad: validar stock, descontarlo y guardar
+# la venta dentro de la misma transacción. BEGIN IMMEDIATE toma el bloqueo de
+# escritura al inicio, así dos cajeros simultáneos se serializan en vez de
+# pisarse el descuento. Cada línea puede traer su propia "Categoria"; si no,
+# se usa `category`.
+# --------------------------------------------------------------------------------
+@metrics.timed
+def commit_sale(category, items, sale):
+    sale = _sale_header(sale, items)
+    with stock_transaction("venta") as conn:
+        # La venta se inserta primero para que los movimientos lleven su ID
+        sale_id = _insert_sale(conn, sale)
+        _set_movement(conn, "venta", sale_id)
+        categories = set()
+        for item in items:
+            quantity = int(item["Cantidad"])
+            item_category = item.get("Categoria") or category
+            cursor = conn.execute(
+                "UPDATE inventario SET Cantidad = Cantidad - ? "
+                "WHERE Categoria = ? AND ID = ? AND Cantidad >= ?",
+                (quantity, item_category, canonical_id(item["ID"]), quantity))
+            if cursor.rowcount == 0:
+                raise InsufficientStockError(item["Nombre"], quantity)
+            categories.add(item_category)
+        for item_category in categories:
+            _bump_version(conn, f"inventario:{item_category}")
+        _insert_sale_items(conn, sale_id, items, category)
+        _add_to_daily_totals(conn, sale["Fecha"][:10], items, category)
+        metrics.record_io(rows=len(items))
+        return sale_id
+
+
+def _sale_header(sale, items):
+    return {
+        **sale,
+        "Fecha": _format_date(sale.get("Fecha") or datetime.datetime.now()),
+        "Cantidad": sum(int(item["Cantidad"]) for item in items),
+        "Total": sum(float(item["Total"]) for item in items),
+    }
+
+
+def _insert_sale(conn, sale):
+    row = {c: sale.get(c) for c in SALES_COLUMNS}
+    row["Fecha"] = _format_date(row["Fecha"] or datetime.datetime.now())
+    columns = ", ".join(_quote(c) for c in row)
+    placeholders = ", ".join("?" for _ in row)
+    cursor = conn.execute(f"INSERT INTO ventas ({columns}) VALUES ({placeholders})",
+                          [_to_db(v) for v in row.values()])
+    return cursor.lastrowid
+
+
+# --------------------------------------------------------------------------------
+# Resumen diario mantenido en la misma transacción que registra cada venta. Los
+# reportes leen este resumen en vez de recorrer todo el historial de líneas de
+# venta. Las líneas de un mismo artículo se suman antes: la venta cuenta una vez.
+# --------------------------------------------------------------------------------
+_DAILY_TOTALS_KEY = '"Dia", "Categoria", COALESCE("ID", "Nombre"), "ID" IS NULL'
+
+
+def _add_to_daily_totals(conn, day, items, category):
+    totals = {}
+    for item in items:
+        item_category, item_id = item.get("Categoria") or category, canonical_id(_to_db(item.get("ID")))
+        key = (item_category, item_id, item["Nombre"] if item_id is None else None)
+        _, quantity, total = totals.get(key, (None, 0, 0.0))
+        totals[key] = (item["Nombre"], quantity + int(item["Cantidad"]), total + float(item["Total"]))
+    conn.executemany(
+        'INSERT INTO ventas_diarias ("Dia", "Categoria", "ID", "Nombre", "Ventas", "Cantidad", "Total") '
+        f'VALUES (?, ?, ?, ?, 1, ?, ?) ON CONFLICT ({_DAILY_TOTALS_KEY}) DO UPDATE SET '
+        '"Nombre" = excluded."Nombre", '
+        '"Ventas" = "Ventas" + 1, '
+        '"Cantidad" = "Cantidad" + excluded."Cantidad", '
+        '"Total" = "Total" + excluded."Total"',
+        [(day, item_category, item_id, name, quantity, total)
+         for (item_category, item_id, _), (name, quantity, total) in totals.items()])
+
+
+def _rebuild_daily_totals(conn):
+    conn.execute("DELETE FROM ventas_diarias")
+    # Con MAX(rowid) el nombre sale de la última línea de cada artículo
+    conn.execute(
+        'INSERT INTO ventas_diarias ("Dia", "Categoria", "ID", "Nombre", "Ventas", "Cantidad", "Total") '
+        'SELECT "Dia", "Categoria", "ID", "Nombre", "Ventas", "Cantidad", "Total" FROM ('
+        '    SELECT substr(v."Fecha", 1, 10) AS "Dia", i."Categoria", i."ID", i."Nombre", '
+        '    COUNT(DISTINCT i."Venta") AS "Ventas", SUM(i."Cantidad") AS "Cantidad", SUM(i."Total") AS "Total", '
+        '    MAX(i.rowid) '
+        '    FROM venta_items i JOIN ventas v ON v."Venta" = i."Venta" '
+        '    GROUP BY substr(v."Fecha", 1, 10), i."Categoria", COALESCE(i."ID", i."Nombre"), i."ID" IS NULL)')
+
+
+# --------------------------------------------------------------------------------
+# Las bases de datos con el resumen antiguo (agrupado por nombre) lo descartan y
+# _backfill_daily_totals lo vuelve a armar por artículo
+# --------------------------------------------------------------------------------
+def _migrate_daily_totals(conn):
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(ventas_diarias)")]
+    if columns and "Categoria" not in columns:
+        conn.execute("DROP TABLE ventas_diarias")
+    conn.executescript(DAILY_TOTALS_SCHEMA)
+
+
+def _backfill_daily_totals(conn):
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        empty = conn.execute("SELECT 1 FROM ventas_diarias LIMIT 1").fetchone() is None
+        if empty and conn.execute("SELECT 1 FROM venta_items LIMIT 1").fetchone() is not None:
+            _rebuild_daily_totals(conn)
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+def read_daily_totals(start, end):
+    return pd.read_sql_query(
+        'SELECT "Dia", "Categoria", "ID", "Nombre", "Ventas", "Cantidad", "Total" FROM ventas_diarias '
+        'WHERE "Dia" >= ? AND "Dia" < ? ORDER BY "Dia"',
+        get_connection(), params=(start.isoformat(), end.isoformat()), parse_dates=["Dia"])
+
+
+# --------------------------------------------------------------------------------
+# Reporte por período ("D" día, "W" semana, "M" mes) a partir del resumen diario,
+# y los `top` artículos más vendidos de cada período con su nombre más reciente
+# --------------------------------------------------------------------------------
+@metrics.timed
+def sales_report(start, end, period="D", top=10):
+    daily = read_daily_totals(start, end)
+    periods = daily["Dia"].dt.to_period(period).dt.start_time.rename("Periodo")
+    by_period = daily.groupby(periods)[["Cantidad", "Total"]].sum()
+    items = daily.assign(Periodo=periods, Articulo=daily["ID"].fillna(daily["Nombre"]), SinID=daily["ID"].isna())
+    top_products = (items.groupby(["Periodo", "Categoria", "Articulo", "SinID"], sort=False)
+                    .agg(ID=("ID", "first"), Nombre=("Nombre", "last"),
+                         Ventas=("Ventas", "sum"), Cantidad=("Cantidad", "sum"), Total=("Total", "sum"))
+                    .reset_index().drop(columns=["Articulo", "SinID"])
+                    .sort_values(["Periodo", "Total"], ascending=[True, False], kind="stable")
+                    .groupby("Periodo").head(top).reset_index(drop=True))
+    return by_period, top_products
+
+
+# --------------------------------------------------------------------------------
+# Alertas de stock y reposición
+# --------------------------------------------------------------------------------
+def read_reorder_points():
+    def load():
+        rows = get_connection().execute('SELECT "Categoria", "Punto de Reorden" FROM reorden_categorias')
+        return dict(rows.fetchall())
+
+    return _cached("reorden_categorias", load)
+
+
+def category_reorder_point(category):
+    return read_reorder_points().get(category, DEFAULT_REORDER_POINT)
+
+
+# --------------------------------------------------------------------------------
+# Punto de reorden de una categoría (None vuelve al predeterminado). Los
+# disparadores recalculan la marca de stock bajo de sus artículos.
+# --------------------------------------------------------------------------------
+def set_category_reorder_point(category, reorder_point):
+    with transaction() as conn:
+        if reorder_point is None:
+            conn.execute('DELETE FROM reorden_categorias WHERE "Categoria" = ?', (category,))
+        else:
+            conn.execute(
+                'INSERT INTO reorden_categorias ("Categoria", "Punto de Reorden") VALUES (?, ?) '
+                'ON CONFLICT ("Categoria") DO UPDATE SET "Punto de Reorden" = excluded."Punto de Reorden"',
+                (category, int(reorder_point)))
+        _bump_version(conn, "reorden_categorias")
+        _bump_version(conn, f"inventario:{category}")
+
+
+def low_stock_counts():
+    # Recorre solo el índice parcial de artículos marcados
+    rows = get_connection().execute(
+        'SELECT "Categoria", COUNT(*) FROM inventario WHERE "Bajo Stock" = 1 GROUP BY "Categoria"')
+    return dict(rows.fetchall())
+
+
+def _effective_inventory():
+    return pd.read_sql_query(
+        'SELECT i."Categoria", i."ID", i."Nombre", i."Cantidad", '
+        f'COALESCE(i."Punto de Reorden", r."Punto de Reorden", {DEFAULT_REORDER_POINT}) AS "Punto de Reorden", '
+        'i."Bajo Stock" FROM inventario i LEFT JOIN reorden_categorias r ON r."Categoria" = i."Categoria" '
+        'ORDER BY i."Categoria", i.rowid',
+        get_connection())
+
+
+def sales_velocity(days):
+    # Unidades vendidas por artículo en los últimos `days` días (índice sobre Fecha)
+    since = datetime.datetime.now() - datetime.timedelta(days=days)
+    return pd.read_sql_query(
+        'SELECT i."Categoria", i."ID", SUM(i."Cantidad") AS "Vendidas" '
+        'FROM venta_items i JOIN ventas v ON v."Venta" = i."Venta" '
+        'WHERE v."Fecha" >= ? AND i."ID" IS NOT NULL '
+        'GROUP BY i."Categoria", i."ID"',
+        get_connection(), params=(_format_date(since),))
+
+
+# --------------------------------------------------------------------------------
+# Reporte de reposición de las cuatro categorías: ritmo de venta de los últimos
+# `days` días, días de stock restantes a ese ritmo y cantidad sugerida para
+# cubrir `cover_days` días por encima del punto de reorden. Todo vectorizado.
+# --------------------------------------------------------------------------------
+@metrics.timed
+def reorder_report(days=30, cover_days=30):
+    report = _effective_inventory().merge(sales_velocity(days), on=["Categoria", "ID"], how="left")
+    report["Vendidas"] = report["Vendidas"].fillna(0).astype(int)
+    report["Bajo Stock"] = report["Bajo Stock"].astype(bool)
+    velocity = report["Vendidas"] / days
+    report["Venta Diaria"] = velocity.round(2)
+    report["Días de Stock"] = (report["Cantidad"] / velocity.where(velocity > 0)).round(1)
+    target = report["Punto de Reorden"] + np.ceil(velocity * cover_days)
+    report["Sugerido"] = (target - report["Cantidad"]).clip(lower=0).astype(int)
+    return report.sort_values(["Bajo Stock", "Días de Stock"], ascending=[False, True],
+                              na_position="last", kind="stable").reset_index(drop=True)
+
+
+# --------------------------------------------------------------------------------
+# Reposición: suma `quantity` unidades recibidas al stock de un artículo y
+# devuelve la nueva cantidad (None si el artículo no existe)
+# --------------------------------------------------------------------------------
+def restock_item(category, item_id, quantity, reference=None):
+    with stock_transaction("reposicion", reference) as conn:
+        row = conn.execute(
+            "UPDATE inventario SET Cantidad = Cantidad + ? WHERE Categoria = ? AND ID = ? RETURNING Cantidad",
+            (int(quantity), category, canonical_id(item_id))).fetchone()
+        if row is not None:
+            _bump_version(conn, f"inventario:{category}")
+    return None if row is None else row[0]
+
+
+# --------------------------------------------------------------------------------
+# Cortes de stock
+# --------------------------------------------------------------------------------
+def _insert_snapshot(conn):
+    last = conn.execute('SELECT COALESCE(MAX("Movimiento"), 0) FROM movimientos').fetchone()[0]
+    snapshot = conn.execute(
+        "INSERT INTO cortes_stock (\"Fecha\", \"Movimiento\") VALUES (datetime('now', 'localtime'), ?)",
+        (last,)).lastrowid
+    conn.execute('INSERT INTO corte_stock_items ("Corte", "Categoria", "ID", "Cantidad") '
+                 'SELECT ?, "Categoria", "ID", "Cantidad" FROM inventario', (snapshot,))
+    _bump_version(conn, "cortes_stock")
+    return snapshot
+
+
+@metrics.timed
+def take_snapshot():
+    with transaction() as conn:
+        return _insert_snapshot(conn)
+
+
+def _next_snapshot_at():
+    # Movimiento a partir del cual toca el siguiente corte; solo se recalcula
+    # (contando los artículos) cuando se toma un corte
+    def load():
+        conn = get_connection()
+        last = conn.execute('SELECT COALESCE(MAX("Movimiento"), 0) FROM cortes_stock').fetchone()[0]
+        items = conn.execute("SELECT COUNT(*) FROM inventario").fetchone()[0]
+        return last + max(items, SNAPSHOT_MIN_MOVEMENTS)
+
+    return _cached("cortes_stock", load)
+
+
+def _maybe_snapshot():
+    last = get_connection().execute('SELECT MAX("Movimiento") FROM movimientos').fetchone()[0]
+    if last is not None and last >= _next_snapshot_at():
+        take_snapshot()
+
+
+# --------------------------------------------------------------------------------
+# Stock de cada artículo antes de `until` (fecha y hora; None para el actual):
+# parte del último corte anterior y suma solo los movimientos posteriores a él.
+# El stock actual se sigue leyendo de inventario, que el libro reproduce. Los
+# artículos eliminados llevan el nombre de su último movimiento y no aparecen
+# si a esa fecha no tenían stock.
+# --------------------------------------------------------------------------------
+@metrics.timed
+def stock_as_of(until=None, category=None):
+    conn = get_connection()
+    bound = None if until is None else _format_date(until)
+    snapshot = conn.execute(
+        'SELECT "Corte", "Movimiento" FROM cortes_stock WHERE ? IS NULL OR "Fecha" < ? '
+        'ORDER BY "Corte" DESC LIMIT 1', (bound, bound)).fetchone()
+    snapshot, first = snapshot if snapshot else (None, 0)
+    category_filter = "" if category is None else 'AND "Categoria" = :categoria'
+    return pd.read_sql_query(
+        'SELECT s."Categoria", s."ID", COALESCE(i."Nombre", ('
+        '    SELECT m."Nombre" FROM movimientos m WHERE m."Categoria" = s."Categoria" AND m."ID" = s."ID" '
+        '    AND m."Nombre" IS NOT NULL ORDER BY m."Movimiento" DESC LIMIT 1)) AS "Nombre", '
+        '    SUM(s."Cantidad") AS "Cantidad" FROM ('
+        '    SELECT "Categoria", "ID", "Cantidad" FROM corte_stock_items '
+        f'   WHERE "Corte" = :corte {category_filter}'
+        '    UNION ALL'
+        '    SELECT "Categoria", "ID", "Cambio" FROM movimientos '
+        f'   WHERE "Movimiento" > :desde AND (:hasta IS NULL OR "Fecha" < :hasta) {category_filter}'
+        ') s LEFT JOIN inventario i ON i."Categoria" = s."Categoria" AND i."ID" = s."ID" '
+        'GROUP BY s."Categoria", s."ID" HAVING SUM(s."Cantidad") <> 0 OR MAX(i."ID") IS NOT NULL '
+        'ORDER BY s."Categoria", s."ID"',
+        conn, params={"corte": snapshot, "desde": first, "hasta": bound, "categoria": category},
+        dtype={"Categoria": "string", "ID": "string", "Nombre": "string", "Cantidad": "int64"})
+
+
+# --------------------------------------------------------------------------------
+# Movimientos para auditoría: de un artículo (los más recientes primero) o de un
+# rango de fechas [start, end)
+# --------------------------------------------------------------------------------
+_MOVEMENT_SELECT = '"Movimiento", "Fecha", "Categoria", "ID", "Nombre", "Tipo", "Cambio", "Cantidad", "Referencia"'
+
+
+@metrics.timed
+def item_movements(category, item_id, limit=500):
+    return pd.read_sql_query(
+        f'SELECT {_MOVEMENT_SELECT} FROM movimientos WHERE "Categoria" = ? AND "ID" = ? '
+        'ORDER BY "Movimiento" DESC LIMIT ?',
+        get_connection(), params=(category, canonical_id(item_id), int(limit)), index_col="Movimiento")
+
+
+@metrics.timed
+def read_movements(start, end, category=None):
+    category_filter = "" if category is None else 'AND "Categoria" = ?'
+    params = [_format_date(start), _format_date(end)] + ([] if category is None else [category])
+    return pd.read_sql_query(
+        f'SELECT {_MOVEMENT_SELECT} FROM movimientos WHERE "Fecha" >= ? AND "Fecha" < ? {category_filter} '
+        'ORDER BY "Movimiento"',
+        get_connection(), params=params, index_col="Movimiento")
+
+
+# --------------------------------------------------------------------------------
+# Exportaciones para contabilidad: estado de cada destino ("parquet", "excel")
+# con la última venta exportada y las versiones de los datos que exportó
+# --------------------------------------------------------------------------------
+EXPORT_STATE_COLUMNS = ["destino", "venta", "historial", "inventario", "fecha", "resultado"]
+
+
+def read_export_state(target):
+    row = get_connection().execute(
+        f"SELECT {', '.join(_quote(c) for c in EXPORT_STATE_COLUMNS)} FROM exportaciones WHERE destino = ?",
+        (target,)).fetchone()
+    if row is None:
+        row = (target, 0, 0, None, None, None)
+    return dict(zip(EXPORT_STATE_COLUMNS, row))
+
+
+def read_export_states():
+    return pd.read_sql_query(
+        f"SELECT {', '.join(_quote(c) for c in EXPORT_STATE_COLUMNS)} FROM exportaciones ORDER BY destino",
+        get_connection())
+
+
+def save_export_state(target, **fields):
+    state = {**read_export_state(target), **fields, "destino": target}
+    with transaction() as conn:
+        conn.execute(
+            f"INSERT OR REPLACE INTO exportaciones ({', '.join(_quote(c) for c in EXPORT_STATE_COLUMNS)}) "
+            f"VALUES ({', '.join('?' for _ in EXPORT_STATE_COLUMNS)})",
+            [state[c] for c in EXPORT_STATE_COLUMNS])
+
+
+def export_versions():
+    # Versión del historial de ventas (cambia al reemplazarlo) y del inventario
+    # de cada categoría, para saber si hay que volver a exportarlos
+    inventory = ",".join(str(_current_version(f"inventario:{c}")) for c in inventory_files)
+    return _current_version("historial_ventas"), inventory
+
+
+def last_sale_id():
+    return get_connection().execute('SELECT COALESCE(MAX("Venta"), 0) FROM ventas').fetchone()[0]
+
+
+# --------------------------------------------------------------------------------
+# Hasta `limit` ventas con ID en (after, until] y sus líneas con la fecha y la
+# categoría, para exportar el historial por bloques sin cargarlo entero
+# --------------------------------------------------------------------------------
+@metrics.timed
+def read_sales_batch(after, until, limit):
+    select = ", ".join(_quote(c) for c in ["Venta", *SALES_COLUMNS])
+    conn = get_connection()
+    sales = pd.read_sql_query(
+        f'SELECT {select} FROM ventas WHERE "Venta" > ? AND "Venta" <= ? ORDER BY "Venta" LIMIT ?',
+        conn, params=(int(after), int(until), int(limit)))
+    if sales.empty:
+        return sales, pd.DataFrame(columns=["Venta", "Fecha", "Categoria", *SALE_ITEM_COLUMNS[1:]])
+    item_select = ", ".join(f"i.{_quote(c)}" for c in ["Categoria", *SALE_ITEM_COLUMNS[1:]])
+    items = pd.read_sql_query(
+        f'SELECT i."Venta", v."Fecha", {item_select} FROM venta_items i JOIN ventas v ON v."Venta" = i."Venta" '
+        'WHERE i."Venta" BETWEEN ? AND ? ORDER BY i."Venta", i.rowid',
+        conn, params=(int(sales["Venta"].iloc[0]), int(sales["Venta"].iloc[-1])))
+    return sales, items
+
+
+def sale_months_after(after, until):
+    # Meses ("AAAA-MM") con ventas de ID en (after, until]
+    rows = get_connection().execute(
+        'SELECT DISTINCT substr("Fecha", 1, 7) FROM ventas WHERE "Venta" > ? AND "Venta" <= ? ORDER BY 1',
+        (int(after), int(until)))
+    return [month for (month,) in rows]
+
+
+# --------------------------------------------------------------------------------
+# Usuarios en un diccionario {username: (hash, rol)} cacheado por versión: el
+# login es una búsqueda en el diccionario y el archivo solo se relee tras un cambio
+# --------------------------------------------------------------------------------
+def read_user_index():
+    def load():
+        rows = get_connection().execute("SELECT username, password, role FROM usuarios")
+        return {username: (password, role) for username, password, role in rows}
+
+    return _cached("usuarios", load)
+
+
+def insert_user(username, password_hash, role):
+    with transaction() as conn:
+        conn.execute("INSERT INTO usuarios (username, password, role) VALUES (?, ?, ?)",
+                     (username, password_hash, role))
+        _bump_version(conn, "usuarios")
+
+
+def update_user_password(username, password_hash):
+    with transaction() as conn:
+        conn.execute("UPDATE usuarios SET password = ? WHERE username = ?", (password_hash, username))
+        _bump_version(conn, "usuarios")
@@ -0,0 +1,30 @@
+import os
+import shutil
+import sys
+
+import pytest
+
+CODE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, CODE_DIR)
+
+import storage  # noqa: E402
+
+# Archivos del repositorio que la aplicación importa al crear la base de datos
+BUNDLED_FILES = [*storage.inventory_files.values(), *storage.legacy_inventory_files,
+                 storage.SALES_FILE, storage.USER_FILE]
+
+
+# --------------------------------------------------------------------------------
+# Base de datos nueva en una carpeta temporal con una copia de los CSV del
+# repositorio (la importación inicial corre con la primera conexión)
+# --------------------------------------------------------------------------------
+@pytest.fixture
+def vivero(tmp_path, monkeypatch):
+    for file_name in BUNDLED_FILES:
+        if os.path.exists(os.path.join(CODE_DIR, file_name)):
+            shutil.copy(os.path.join(CODE_DIR, file_name), tmp_path)
+    monkeypatch.chdir(tmp_path)
+    previous_db = storage.DB_FILE
+    storage.set_database(str(tmp_path / "vivero.db"))
+    yield tmp_path
+    storage.set_database(previous_db)
@@ -0,0 +1,78 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import auth
+import storage
+from api import app
+
+
+@pytest.fixture
+def client(vivero):
+    return TestClient(app)
+
+
+def _login(client, username="admin", password="admin123"):
+    response = client.post("/sesiones", json={"username": username, "password": password})
+    assert response.status_code == 200
+    return {"Authorization": f"Bearer {response.json()['token']}"}
+
+
+# --------------------------------------------------------------------------------
+# Sesiones y permisos
+# --------------------------------------------------------------------------------
+def test_login_and_logout(client):
+    assert client.post("/sesiones", json={"username": "admin", "password": "otra"}).status_code == 401
+    headers = _login(client)
+    assert client.get("/inventario/plantas", headers=headers).status_code == 200
+    assert client.delete("/sesiones", headers=headers).status_code == 204
+    assert client.get("/inventario/plantas", headers=headers).status_code == 401
+
+
+def test_requires_session_and_role(client):
+    assert client.get("/inventario/plantas").status_code in (401, 403)
+    storage.insert_user("bodeguero", auth.hash_password("clave"), "bodega")
+    headers = _login(client, "bodeguero", "clave")
+    sale = {"cliente": "Cliente", "articulos": [{"ID": "1", "Cantidad": 1}]}
+    assert client.post("/ventas", json=sale, headers=headers).status_code == 403
+
+
+# --------------------------------------------------------------------------------
+# Inventario: búsqueda paginada con límites, artículos inexistentes
+# --------------------------------------------------------------------------------
+def test_search_pages_are_bounded(client):
+    headers = _login(client)
+    response = client.get("/inventario/plantas", params={"por_pagina": 1}, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["total"] == 2 and len(response.json()["articulos"]) == 1
+    for params in ({"por_pagina": -1}, {"por_pagina": 0}, {"por_pagina": 1001}, {"pagina": 0}):
+        assert client.get("/inventario/plantas", params=params, headers=headers).status_code == 422
+    for limit in (0, -1, 5001):
+        response = client.get("/inventario/plantas/1/movimientos", params={"limite": limit}, headers=headers)
+        assert response.status_code == 422
+
+
+def test_missing_category_and_item(client):
+    headers = _login(client)
+    assert client.get("/inventario/arboles", headers=headers).status_code == 404
+    assert client.get("/inventario/plantas/999", headers=headers).status_code == 404
+    assert client.get("/inventario/plantas/0001", headers=headers).json()["Nombre"] == "ROSAS"
+
+
+# --------------------------------------------------------------------------------
+# Ventas: venta registrada, sobreventa y cantidades inválidas
+# --------------------------------------------------------------------------------
+def test_sale_status_codes(client):
+    headers = _login(client)
+    sale = {"cliente": "Cliente", "articulos": [{"ID": "2", "Cantidad": 2}]}
+    response = client.post("/ventas", json=sale, headers=headers)
+    assert response.status_code == 201
+    assert client.get(f"/ventas/{response.json()['Venta']}/factura", headers=headers).status_code == 200
+
+    oversell = {"cliente": "Cliente", "articulos": [{"ID": "2", "Cantidad": 100}]}
+    assert client.post("/ventas", json=oversell, headers=headers).status_code == 409
+    invalid = {"cliente": "Cliente", "articulos": [{"ID": "2", "Cantidad": 0}]}
+    assert client.post("/ventas", json=invalid, headers=headers).status_code == 422
+    missing = {"cliente": "Cliente", "articulos": [{"ID": "999", "Cantidad": 1}]}
+    assert client.post("/ventas", json=missing, headers=headers).status_code == 404
+    assert client.get("/ventas/999999/factura", headers=headers).status_code == 404
+    assert storage.find_item("plantas", "2")["Cantidad"] == 5
@@ -0,0 +1,91 @@
+import datetime
+import os
+
+import pandas as pd
+import pytest
+
+import exports
+import services
+import storage
+
+pytest.importorskip("pyarrow")
+
+
+def _parquet(out_dir, name):
+    return pd.read_parquet(os.path.join(out_dir, "parquet", name))
+
+
+def _parts(out_dir):
+    root = os.path.join(out_dir, "parquet", "ventas")
+    return sorted(os.path.relpath(os.path.join(folder, file_name), root)
+                  for folder, _, files in os.walk(root) for file_name in files)
+
+
+def _sell(quantity=1):
+    return services.record_sale("plantas", [{"ID": "1", "Cantidad": quantity}], "Cliente")["Venta"]
+
+
+# --------------------------------------------------------------------------------
+# Cada ejecución solo agrega las ventas nuevas
+# --------------------------------------------------------------------------------
+def test_second_run_exports_only_new_sales(vivero):
+    out_dir = str(vivero / "exportaciones")
+    assert exports.export_parquet(out_dir) == 4
+    assert exports.export_excel(out_dir) == 1
+    first_parts = _parts(out_dir)
+
+    sale_id = _sell()
+    assert exports.export_parquet(out_dir) == 1
+    month = datetime.date.today().strftime("%Y-%m")
+    assert _parts(out_dir) == sorted([*first_parts, os.path.join(f"mes={month}", f"parte-{sale_id:012d}.parquet")])
+    # Solo se reescribe el libro del mes de la venta nueva
+    assert exports.export_excel(out_dir) == 1
+    assert os.path.exists(os.path.join(out_dir, "excel", f"ventas_{month}.xlsx"))
+
+    assert exports.export_parquet(out_dir) == 0
+    assert exports.export_excel(out_dir) == 0
+    sales = _parquet(out_dir, "ventas")
+    assert sorted(sales["Venta"]) == sorted(storage.read_sales_between(
+        datetime.date(2000, 1, 1), datetime.date(2100, 1, 1)).index)
+
+
+def test_replaced_history_is_exported_again(vivero):
+    out_dir = str(vivero / "exportaciones")
+    exports.export_parquet(out_dir)
+    exports.export_excel(out_dir)
+
+    sales = storage.read_sales_between(datetime.date(2000, 1, 1), datetime.date(2100, 1, 1)).iloc[:2]
+    storage.replace_sales(sales, storage.read_sale_items(sales.index))
+
+    assert exports.export_parquet(out_dir) == 2
+    assert sorted(_parquet(out_dir, "ventas")["Venta"]) == sorted(sales.index)
+    assert set(_parquet(out_dir, "venta_items")["Venta"]) == set(sales.index)
+    assert exports.export_excel(out_dir) == 1
+
+
+def test_interrupted_run_does_not_duplicate_parts(vivero, monkeypatch):
+    out_dir = str(vivero / "exportaciones")
+    for _ in range(3):
+        _sell()
+    monkeypatch.setattr(exports, "EXPORT_BATCH", 2)
+
+    # Se corta después de escribir el segundo bloque y antes de guardar su avance
+    save_state, calls = storage.save_export_state, []
+
+    def interrupted(target, **fields):
+        calls.append(target)
+        if len(calls) == 2:
+            raise KeyboardInterrupt
+        save_state(target, **fields)
+
+    monkeypatch.setattr(storage, "save_export_state", interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        exports.export_parquet(out_dir)
+    monkeypatch.setattr(storage, "save_export_state", save_state)
+    assert storage.read_export_state("parquet")["venta"] == 2
+
+    assert exports.export_parquet(out_dir) == 5
+    sales = _parquet(out_dir, "ventas")
+    assert len(sales) == 7 and sales["Venta"].is_unique
+    items = _parquet(out_dir, "venta_items")
+    assert len(items) == len(storage.read_sale_items(sales["Venta"]))
@@ -0,0 +1,372 @@
+import datetime
+import io
+import time
+
+import pandas as pd
+import pytest
+
+import auth
+import bulk_import
+import services
+import storage
+
+
+def _all_sales():
+    return storage.read_sales_between(datetime.date(2000, 1, 1), datetime.date(2100, 1, 1))
+
+
+# --------------------------------------------------------------------------------
+# Importación inicial de los CSV del repositorio
+# --------------------------------------------------------------------------------
+def test_migrates_bundled_csvs(vivero):
+    plants = storage.read_inventory("plantas")
+    # El archivo antiguo solo aporta los artículos que no están en el nuevo
+    assert plants.loc["1", "Nombre"] == "ROSAS"
+    assert plants.loc["1", "Cantidad"] == 36
+    tools = storage.read_inventory("herramientas")
+    # "0002" se guarda con el ID canónico
+    assert list(tools.index) == ["1", "2"]
+    assert storage.read_inventory("productos")["Precio Unitario"].isna().all()
+
+    sales = _all_sales()
+    assert len(sales) == 4
+    items = storage.read_sale_items(sales.index)
+    first = items[items["Venta"] == sales.index[0]]
+    # 5 unidades por 14000: 3 GIRASOL a 3000 y 2 ROSAS a 2500
+    assert first[["Nombre", "Cantidad"]].values.tolist() == [["GIRASOL", 3], ["ROSAS", 2]]
+    assert items.groupby("Venta")["Total"].sum().tolist() == sales["Total"].tolist()
+
+    assert set(storage.read_user_index()) == {"admin", "emanuel"}
+
+
+def test_second_start_does_not_import_again(vivero):
+    storage.get_connection()
+    storage.set_database(storage.DB_FILE)
+    assert len(_all_sales()) == 4
+    assert len(storage.read_inventory("plantas")) == 2
+
+
+# --------------------------------------------------------------------------------
+# Ventas: descuento de stock en la misma transacción y rechazo de sobreventas
+# --------------------------------------------------------------------------------
+def test_sale_commits_stock_and_lines(vivero):
+    # Las herramientas del repositorio no tienen precio
+    storage.update_item_fields("herramientas", "2", {"Precio Unitario": 15000})
+    sale = services.record_sale("plantas", [{"ID": "2", "Cantidad": 3},
+                                            {"Categoria": "herramientas", "ID": "0002", "Cantidad": 1}], "Cliente")
+    assert storage.find_item("plantas", "2")["Cantidad"] == 4
+    assert storage.find_item("herramientas", "2")["Cantidad"] == 49
+    lines = storage.read_sale_items([sale["Venta"]])
+    assert lines["Nombre"].tolist() == ["GIRASOL", "PALA"]
+    assert storage.read_sale(sale["Venta"])["Total"] == sale["Total"]
+
+
+def test_oversell_is_rejected_without_changes(vivero):
+    sales_before = len(_all_sales())
+    with pytest.raises(storage.InsufficientStockError):
+        services.record_sale("plantas", [{"ID": "1", "Cantidad": 1}, {"ID": "2", "Cantidad": 8}], "Cliente")
+    assert storage.find_item("plantas", "1")["Cantidad"] == 36
+    assert storage.find_item("plantas", "2")["Cantidad"] == 7
+    assert len(_all_sales()) == sales_before
+
+
+# --------------------------------------------------------------------------------
+# Libro de movimientos y cortes de stock
+# --------------------------------------------------------------------------------
+def test_stock_as_of_after_snapshot(vivero):
+    services.record_sale("plantas", [{"ID": "1", "Cantidad": 6}], "Cliente")
+    storage.take_snapshot()
+    storage.restock_item("plantas", "1", 10, "F-1")
+    services.record_sale("plantas", [{"ID": "2", "Cantidad": 2}], "Cliente")
+
+    stock = storage.stock_as_of().set_index(["Categoria", "ID"])["Cantidad"]
+    current = storage.read_all_inventory().set_index(["Categoria", "ID"])["Cantidad"]
+    assert stock.sort_index().to_dict() == current.sort_index().to_dict()
+    assert stock[("plantas", "1")] == 40
+
+    movements = storage.item_movements("plantas", "1")
+    assert movements["Tipo"].tolist()[:2] == ["reposicion", "venta"]
+    assert movements["Cambio"].tolist()[:2] == [10, -6]
+
+
+def test_stock_as_of_keeps_deleted_item_names(vivero):
+    storage.get_connection()
+    before = datetime.datetime.now() + datetime.timedelta(seconds=1)
+    time.sleep(1.1)
+    storage.delete_item_row("plantas", "2")
+
+    stock = storage.stock_as_of(before, "plantas").set_index("ID")
+    assert stock.loc["2", "Nombre"] == "GIRASOL" and stock.loc["2", "Cantidad"] == 7
+    # Eliminado y sin stock: ya no aparece
+    assert storage.stock_as_of(category="plantas")["ID"].tolist() == ["1"]
+
+
+def test_movement_names_are_added_to_old_ledgers(vivero):
+    storage.restock_item("plantas", "1", 1)
+    conn = storage.get_connection()
+    for trigger in ("inventario_movimiento_alta", "inventario_movimiento_cambio", "inventario_movimiento_baja"):
+        conn.execute(f"DROP TRIGGER {trigger}")
+    conn.execute('ALTER TABLE movimientos DROP COLUMN "Nombre"')
+    storage.set_database(storage.DB_FILE)
+
+    assert storage.item_movements("plantas", "1")["Nombre"].tolist() == ["ROSAS"]
+    storage.restock_item("plantas", "2", 1)
+    assert storage.item_movements("plantas", "2")["Nombre"].iloc[0] == "GIRASOL"
+
+
+# --------------------------------------------------------------------------------
+# Contraseñas con el hash antiguo (SHA-256 sin sal)
+# --------------------------------------------------------------------------------
+def test_legacy_hash_is_rehashed_on_login(vivero):
+    assert auth.needs_rehash(storage.read_user_index()["admin"][0])
+    token = auth.authenticate("admin", "admin123")
+    assert auth.session_user(token)["role"] == "admin"
+
+    stored = storage.read_user_index()["admin"][0]
+    assert stored.startswith(f"{auth.HASH_ALGORITHM}$")
+    assert not auth.needs_rehash(stored)
+    assert auth.verify_password("admin123", stored)
+    with pytest.raises(auth.AuthenticationError):
+        auth.authenticate("admin", "otra")
+
+
+# --------------------------------------------------------------------------------
+# Reparto de cantidades de las ventas antiguas
+# --------------------------------------------------------------------------------
+def test_legacy_split_finds_exact_quantities():
+    assert storage._split_legacy_quantities([3000.0, 2500.0], 5, 14000.0) == [3, 2]
+    prices = [1200.0, 3500.0, 800.0, 2650.0, 4100.0, 990.0]
+    quantities = [7, 2, 11, 3, 1, 5]
+    total = sum(q * p for q, p in zip(quantities, prices))
+    found = storage._split_legacy_quantities(prices, sum(quantities), total)
+    assert sum(q * p for q, p in zip(found, prices)) == pytest.approx(total)
+
+
+@pytest.mark.parametrize("lines, quantity", [(5, 200), (6, 120), (8, 100), (12, 150)])
+def test_legacy_split_without_solution_is_bounded(lines, quantity):
+    # Totales que no cuadran: antes se probaban todos los repartos (minutos u horas)
+    prices = [1000.0 + 37 * i for i in range(lines)]
+    begin = time.perf_counter()
+    total = sum(prices) / lines * quantity + 0.5
+    found = storage._split_legacy_quantities(prices, quantity, total)
+    assert time.perf_counter() - begin < 2
+    assert found == [quantity - lines + 1] + [1] * (lines - 1)
+
+
+@pytest.mark.parametrize("plants, prices, quantity, total", [
+    ("GIRASOL, ROSAS", None, 5, 14000.0),          # sin precios
+    ("GIRASOL, ROSAS", "3000", 5, 14000.0),        # menos precios que plantas
+    ("GIRASOL, ROSAS", "3000,2500", 5, 14000.0),   # reparto exacto
+    ("GIRASOL, ROSAS", "3000,2500", 5, 14100.0),   # sin reparto exacto
+    ("GIRASOL, ROSAS, LIRIO", "1000,2000,3000", 2, 9000.0),
+])
+def test_legacy_lines_add_up_to_sale_total(plants, prices, quantity, total):
+    items = storage._legacy_sale_items(plants, prices, quantity, total, {})
+    assert sum(item["Total"] for item in items) == pytest.approx(total)
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("0002", "2"), (2.0, "2"), ("2.0", "2"), (" 007 ", "7"), ("A01", "A01"), ("²", "²"), ("1²", "1²"), ("", None),
+])
+def test_canonical_id(value, expected):
+    assert storage.canonical_id(value) == expected
+
+
+def test_bulk_import_keeps_unicode_digit_ids(vivero):
+    data = io.BytesIO("ID,Nombre\n²,HELECHO\n0003,CACTUS\n".encode("utf-8"))
+    report = bulk_import.import_inventory(data, "carga.csv", "plantas")
+    assert report["insertados"] == 2
+    assert storage.find_item("plantas", "²")["Nombre"] == "HELECHO"
+
+
+def test_find_item_reads_one_row_after_writes(vivero):
+    services.record_sale("plantas", [{"ID": "1", "Cantidad": 1}], "Cliente")
+    storage.clear_cache()
+    item = storage.find_item("plantas", "0001")
+    assert item["Cantidad"] == 35 and item["Nombre"] == "ROSAS"
+    assert storage.find_item("plantas", name="GIRASOL")["ID"] == "2"
+    assert storage.find_item("plantas", "99") is None
+
+
+# --------------------------------------------------------------------------------
+# Resumen diario de ventas por artículo
+# --------------------------------------------------------------------------------
+def test_daily_totals_are_kept_per_item(vivero):
+    # Otro artículo con el mismo nombre y uno de otra categoría con el mismo nombre
+    storage.insert_item("plantas", {"ID": "10316", "Nombre": "ROSAS", "Cantidad": 5, "Precio Unitario": 1000})
+    storage.insert_item("productos", {"ID": "7", "Nombre": "ROSAS", "Cantidad": 5, "Precio Unitario": 500})
+    services.record_sale("plantas", [{"ID": "1", "Cantidad": 1}, {"ID": "1", "Cantidad": 2},
+                                     {"ID": "10316", "Cantidad": 1},
+                                     {"Categoria": "productos", "ID": "7", "Cantidad": 1}], "Cliente")
+    services.record_sale("plantas", [{"ID": "1", "Cantidad": 1}], "Cliente")
+    storage.update_item_fields("plantas", "1", {"Nombre": "ROSAS ROJAS"})
+    services.record_sale("plantas", [{"ID": "1", "Cantidad": 1}], "Cliente")
+
+    def today_totals():
+        today = datetime.date.today()
+        daily = storage.read_daily_totals(today, today + datetime.timedelta(days=1))
+        return daily.set_index(["Categoria", "ID"])[["Nombre", "Ventas", "Cantidad", "Total"]].sort_index()
+
+    incremental = today_totals()
+    assert incremental.loc[("plantas", "1")].tolist() == ["ROSAS ROJAS", 3, 5, 12500.0]
+    assert incremental.loc[("plantas", "10316"), "Cantidad"] == 1
+    assert incremental.loc[("productos", "7"), "Cantidad"] == 1
+
+    with storage.transaction() as conn:
+        storage._rebuild_daily_totals(conn)
+    assert today_totals().equals(incremental)
+
+    _, top = storage.sales_report(datetime.date.today(), datetime.date.today() + datetime.timedelta(days=1))
+    assert top.iloc[0][["Categoria", "ID", "Nombre", "Cantidad"]].tolist() == ["plantas", "1", "ROSAS ROJAS", 5]
+    assert len(top) == 3
+
+
+@pytest.mark.parametrize("period, expected", [
+    ("D", [("2025-01-06", "ROSAS"), ("2025-01-07", "GIRASOL"), ("2025-02-03", "ROSAS")]),
+    ("W", [("2025-01-06", "GIRASOL"), ("2025-02-03", "ROSAS")]),
+    ("M", [("2025-01-01", "GIRASOL"), ("2025-02-01", "ROSAS")]),
+])
+def test_best_sellers_per_period(vivero, period, expected):
+    sales = pd.DataFrame({"Fecha": ["2025-01-06 10:00:00", "2025-01-07 10:00:00", "2025-02-03 10:00:00"],
+                          "Cliente": "Cliente", "Cantidad": [6, 10, 1], "Total": [15500.0, 30000.0, 2500.0]},
+                         index=pd.Index([1, 2, 3], name="Venta"))
+    items = pd.DataFrame({"Venta": [1, 1, 2, 3], "ID": ["1", "2", "2", "1"],
+                          "Nombre": ["ROSAS", "GIRASOL", "GIRASOL", "ROSAS"], "Cantidad": [5, 1, 10, 1],
+                          "Precio Unitario": [2500.0, 3000.0, 3000.0, 2500.0],
+                          "Total": [12500.0, 3000.0, 30000.0, 2500.0]})
+    storage.replace_sales(sales, items)
+
+    by_period, top = storage.sales_report(datetime.date(2025, 1, 1), datetime.date(2025, 3, 1), period, top=1)
+    assert [(str(p.date()), name) for p, name in zip(top["Periodo"], top["Nombre"])] == expected
+    assert list(by_period.index) == list(top["Periodo"])
+    assert by_period["Total"].sum() == 48000.0
+
+
+def test_old_daily_totals_are_rebuilt_per_item(vivero):
+    conn = storage.get_connection()
+    conn.executescript('DROP TABLE ventas_diarias; CREATE TABLE ventas_diarias ("Dia" TEXT, "Nombre" TEXT, '
+                       '"Ventas" INTEGER, "Cantidad" INTEGER, "Total" REAL, PRIMARY KEY ("Dia", "Nombre"));')
+    storage.set_database(storage.DB_FILE)
+    daily = storage.read_daily_totals(datetime.date(2024, 12, 1), datetime.date(2025, 1, 1))
+    roses = daily[daily["Nombre"] == "ROSAS"]
+    assert roses["ID"].tolist() == ["1"] and roses["Ventas"].tolist() == [2]
+    # ROSAS NEGRAS no está en el inventario: se agrupa por nombre
+    assert daily[daily["Nombre"] == "ROSAS NEGRAS"]["ID"].isna().all()
+
+
+# --------------------------------------------------------------------------------
+# Edición de un artículo con ventas concurrentes
+# --------------------------------------------------------------------------------
+def test_stale_quantity_edit_is_rejected(vivero):
+    shown = storage.find_item("plantas", "1")["Cantidad"]
+    services.record_sale("plantas", [{"ID": "1", "Cantidad": 4}], "Cliente")
+
+    # Sin cambiar la cantidad: se guarda la descripción y se conserva la venta
+    services.update_item("plantas", "1", {"Descripción": "SOMBRA"}, expected_quantity=shown)
+    item = storage.find_item("plantas", "1")
+    assert (item["Descripción"], item["Cantidad"]) == ("SOMBRA", shown - 4)
+
+    with pytest.raises(storage.StockChangedError):
+        services.update_item("plantas", "1", {"Nombre": "OTRO", "Cantidad": 50}, expected_quantity=shown)
+    item = storage.find_item("plantas", "1")
+    assert (item["Nombre"], item["Cantidad"]) == ("ROSAS", shown - 4)
+
+    services.update_item("plantas", "1", {"Cantidad": 50}, expected_quantity=shown - 4)
+    assert storage.find_item("plantas", "1")["Cantidad"] == 50
+
+
+# --------------------------------------------------------------------------------
+# Carga masiva: las filas en blanco se ignoran y los errores conservan su fila
+# --------------------------------------------------------------------------------
+def test_bulk_import_skips_blank_rows(vivero):
+    data = io.BytesIO(b"ID,Nombre,Cantidad\n100,HELECHO,3\n,,\n , ,\n101,,2\n102,CACTUS,-1\n,,\n")
+    report = bulk_import.import_inventory(data, "carga.csv", "plantas")
+    assert report["insertados"] == 1
+    assert report["filas_con_error"] == 2
+    assert [row for row, _ in report["errores"]] == [5, 6]
+    assert report["errores"][0][1] == "Nombre vacío."
+
+
+def _headerless_xlsx(rows):
+    from openpyxl import Workbook
+
+    workbook = Workbook()
+    for row in rows:
+        workbook.active.append(row)
+    data = io.BytesIO()
+    workbook.save(data)
+    data.seek(0)
+    return data
+
+
+@pytest.mark.parametrize("file_name", ["catalogo.csv", "catalogo.xlsx"])
+def test_bulk_import_headerless_file_with_extra_columns(vivero, file_name):
+    rows = [("100", "HELECHO", "3", "1500", "Sombra", "extra", "otra"), ("101", "CACTUS", "2", "900", "", "x", "y")]
+    if file_name.endswith(".csv"):
+        data = io.BytesIO("\n".join(",".join(row) for row in rows).encode("utf-8"))
+    else:
+        data = _headerless_xlsx(rows)
+    report = bulk_import.import_inventory(data, file_name, "plantas")
+    assert report["insertados"] == 2 and report["filas_con_error"] == 0
+    assert storage.find_item("plantas", "100")["Precio Unitario"] == 1500
+
+
+# --------------------------------------------------------------------------------
+# Alertas de stock: los disparadores mantienen "Bajo Stock" con el punto de
+# reorden del artículo, el de su categoría o el predeterminado
+# --------------------------------------------------------------------------------
+def _low_pots():
+    return storage.low_stock_counts().get("maceteros", 0)
+
+
+def _is_low(item_id):
+    return storage.find_item("maceteros", item_id)["Bajo Stock"]
+
+
+def test_low_stock_follows_item_and_category_thresholds(vivero):
+    assert _low_pots() == 0
+    storage.insert_item("maceteros", {"ID": "1", "Nombre": "GRANDE", "Cantidad": 5, "Punto de Reorden": 3})
+    storage.insert_item("maceteros", {"ID": "2", "Nombre": "MEDIANO", "Cantidad": 5, "Precio Unitario": 100})
+    # Propio (5 > 3) y predeterminado (5 <= 10)
+    assert not _is_low("1") and _is_low("2") and _low_pots() == 1
+
+    storage.update_item_fields("maceteros", "1", {"Punto de Reorden": 6})
+    assert _is_low("1") and _low_pots() == 2
+    storage.update_item_fields("maceteros", "1", {"Punto de Reorden": None})
+
+    storage.set_category_reorder_point("maceteros", 4)
+    assert _low_pots() == 0
+    storage.set_category_reorder_point("maceteros", 5)
+    assert _low_pots() == 2
+    storage.set_category_reorder_point("maceteros", 4)
+    storage.set_category_reorder_point("maceteros", None)
+    assert storage.category_reorder_point("maceteros") == storage.DEFAULT_REORDER_POINT
+    assert _low_pots() == 2
+    # El punto de otra categoría no afecta a los maceteros
+    storage.set_category_reorder_point("herramientas", 100)
+    assert _low_pots() == 2
+
+    storage.restock_item("maceteros", "2", 20)
+    assert not _is_low("2") and _low_pots() == 1
+    services.record_sale("maceteros", [{"ID": "2", "Cantidad": 15}], "Cliente")
+    assert _is_low("2") and _low_pots() == 2
+
+
+def test_reorder_report_velocity_and_suggestion(vivero):
+    storage.insert_item("maceteros", {"ID": "1", "Nombre": "GRANDE", "Cantidad": 20, "Precio Unitario": 100})
+    storage.insert_item("maceteros", {"ID": "2", "Nombre": "MEDIANO", "Cantidad": 4, "Punto de Reorden": 6})
+    services.record_sale("maceteros", [{"ID": "1", "Cantidad": 6}], "Cliente")
+
+    report = storage.reorder_report(days=30, cover_days=30).set_index(["Categoria", "ID"])
+    sold = report.loc[("maceteros", "1")]
+    # 6 unidades en 30 días: 0.2 por día, 14 en stock alcanzan para 70 días
+    assert sold["Vendidas"] == 6 and sold["Venta Diaria"] == 0.2
+    assert sold["Días de Stock"] == 70.0
+    # Punto de reorden (10) + 30 días a 0.2 por día (6) - stock (14)
+    assert sold["Sugerido"] == 2 and not sold["Bajo Stock"]
+
+    unsold = report.loc[("maceteros", "2")]
+    assert unsold["Vendidas"] == 0 and pd.isna(unsold["Días de Stock"])
+    assert unsold["Sugerido"] == 2 and unsold["Bajo Stock"]
+    # Primero los artículos bajo el punto de reorden
+    assert report["Bajo Stock"].iloc[0]
@@ -0,0 +1,80 @@
+import os
+
+import streamlit as st
+import pandas as pd
+
+import storage
+import metrics
+import exports
+
+# Páginas solo para administradores: exportación contable y rendimiento
+
+# --------------------------------------------------------------------------------
+# Función para la exportación contable (solo administradores): lanza la
+# exportación en segundo plano y muestra su estado y los libros generados
+# --------------------------------------------------------------------------------
+def view_exports():
+    if st.session_state.role != "admin":
+        st.error("No tienes permisos para exportar datos.")
+        return
+
+    st.subheader("Exportación Contable")
+    st.caption(f"Ventas e inventario en Parquet y Excel en la carpeta '{exports.EXPORT_DIR}'. "
+               "Cada exportación solo agrega las ventas nuevas desde la anterior.")
+    if not exports.parquet_available():
+        st.warning("pyarrow no está instalado: solo se exportará a Excel.")
+
+    if exports.export_running():
+        st.info("Hay una exportación en curso.")
+        if st.button("Actualizar estado"):
+            st.rerun()
+    elif st.button("Exportar ahora"):
+        exports.start_background_export()
+        st.info("Exportación iniciada en segundo plano.")
+
+    states = storage.read_export_states()
+    if not states.empty:
+        st.dataframe(states, use_container_width=True, hide_index=True)
+
+    excel_dir = os.path.join(exports.EXPORT_DIR, "excel")
+    workbooks = sorted(os.listdir(excel_dir), reverse=True) if os.path.isdir(excel_dir) else []
+    workbooks = [name for name in workbooks if name.endswith(".xlsx")]
+    if workbooks:
+        workbook = st.selectbox("Libro de Excel", workbooks)
+        with open(os.path.join(excel_dir, workbook), "rb") as file:
+            st.download_button("Descargar libro", file.read(), workbook,
+                               "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+
+# --------------------------------------------------------------------------------
+# Función para ver el rendimiento de las operaciones (solo administradores):
+# latencias recientes y volumen de datos de este proceso desde su arranque
+# --------------------------------------------------------------------------------
+def view_performance():
+    if st.session_state.role != "admin":
+        st.error("No tienes permisos para ver el rendimiento.")
+        return
+
+    st.subheader("Rendimiento")
+    summary = metrics.summary()
+    if summary.empty:
+        st.info("Todavía no hay operaciones medidas.")
+        return
+
+    # Las operaciones anidadas (p. ej. invoice_for_sale y render_invoice) cuentan
+    # cada una su tiempo y su volumen: los totales de la tabla no se suman entre filas
+    st.write(f"Latencia por operación (p50 y p95 de las últimas {metrics.WINDOW_SIZE} llamadas):")
+    st.bar_chart(summary.set_index("Operación")[["p50 ms", "p95 ms"]])
+    st.dataframe(summary.sort_values("Total s", ascending=False), use_container_width=True, hide_index=True,
+                 column_config={column: st.column_config.NumberColumn(format="%.1f")
+                                for column in ["p50 ms", "p95 ms", "Máx ms", "Total s"]})
+
+    counters = metrics.counters()
+    if counters:
+        st.write("Eventos:")
+        st.dataframe(pd.Series(counters, name="Cantidad").rename_axis("Evento"), use_container_width=True)
+
+    col1, col2 = st.columns(2)
+    col1.download_button("Descargar métricas (Prometheus)", metrics.prometheus_text(), "metricas.txt", "text/plain")
+    if col2.button("Reiniciar métricas"):
+        metrics.reset()
+        st.rerun()
@@ -0,0 +1,56 @@
+import streamlit as st
+import pandas as pd
+import numpy as np
+
+import services
+import metrics
+
+# Piezas de la interfaz que comparten varias páginas: el semáforo de stock y el
+# selector de artículos con búsqueda
+
+CATEGORIES = services.CATEGORIES
+
+# Etiquetas del semáforo de stock
+LOW_STOCK = "🔴 Bajo"
+ENOUGH_STOCK = "🟢 Suficiente"
+
+def add_stock_status(inventory):
+    # Crear columna 'Estado' para el semáforo a partir de la marca de stock bajo que
+    # mantiene la base de datos con el punto de reorden de cada artículo
+    inventory["Estado"] = np.where(inventory.pop("Bajo Stock"), LOW_STOCK, ENOUGH_STOCK)
+    return inventory
+
+# --------------------------------------------------------------------------------
+# Función para mostrar el inventario con semáforo de colores
+# --------------------------------------------------------------------------------
+@metrics.timed
+def display_inventory_with_colors(inventory):
+    if inventory.empty:
+        st.warning("El inventario está vacío.")
+        return
+
+    # Aplicar estilo condicional para la cantidad sobre toda la tabla de una vez
+    def highlight_rows(frame):
+        colors = np.where(frame["Estado"] == LOW_STOCK, "background-color: #ffcccc;", "background-color: #ccffcc;")
+        return pd.DataFrame(np.repeat(colors[:, None], frame.shape[1], axis=1),
+                            index=frame.index, columns=frame.columns)
+
+    styled_inventory = inventory.style.apply(highlight_rows, axis=None)
+    st.write("Inventario:")
+    st.dataframe(styled_inventory, use_container_width=True, hide_index=True)
+
+# --------------------------------------------------------------------------------
+# Selector con búsqueda incremental: en vez de cargar todos los ID en la lista,
+# se escribe parte del ID o del nombre y se eligen entre las primeras coincidencias
+# --------------------------------------------------------------------------------
+def pick_item(category, label, key, in_stock_only=False, limit=50):
+    search = st.text_input(f"Buscar {category[:-1]} por ID o nombre", key=f"{key}_buscar")
+    matches, total = services.search_stock(category, search, page_size=limit, in_stock_only=in_stock_only)
+    if matches.empty:
+        st.info("No hay artículos que coincidan con la búsqueda.")
+        return None
+    if total > limit:
+        st.caption(f"{total} coincidencias; se muestran las primeras {limit}. Escribe más para acotar.")
+    names = matches["Nombre"].to_dict()
+    return st.selectbox(label, matches.index, key=key,
+                        format_func=lambda item_id: f"{item_id} - {names.get(item_id, '')}")
@@ -0,0 +1,225 @@
+import streamlit as st
+import pandas as pd
+
+import storage
+import bulk_import
+import services
+from ui.common import CATEGORIES, add_stock_status, display_inventory_with_colors, pick_item
+
+# Páginas de inventario: exploración por categoría con sus acciones (agregar,
+# actualizar, reponer y eliminar) y la carga masiva desde CSV o Excel
+
+# --------------------------------------------------------------------------------
+# Función para explorar el inventario con búsqueda y paginación: solo la página
+# visible se consulta y se envía al navegador, con una sola consulta por recarga
+# (la página pedida y el total de coincidencias juntos)
+# --------------------------------------------------------------------------------
+def browse_inventory(category):
+    col1, col2 = st.columns([3, 1])
+    search = col1.text_input("Buscar por ID o nombre", key=f"buscar_{category}")
+    page_size = col2.selectbox("Filas por página", [25, 50, 100, 250], index=1, key=f"filas_{category}")
+
+    page_key = f"pagina_{category}"
+    page = st.session_state.get(page_key, 1)
+    inventory, total = services.search_stock(category, search, page=page, page_size=page_size)
+    pages = max((total + page_size - 1) // page_size, 1)
+    if page > pages:
+        # La búsqueda o el tamaño de página cambiaron: se vuelve a la primera página
+        page = st.session_state[page_key] = 1
+        inventory, total = services.search_stock(category, search, page=page, page_size=page_size)
+    st.number_input(f"Página (de {pages})", min_value=1, max_value=pages, step=1, key=page_key)
+
+    display_inventory_with_colors(add_stock_status(inventory))
+    if total:
+        first = (page - 1) * page_size + 1
+        st.caption(f"Mostrando {first}-{first + len(inventory) - 1} de {total} artículos.")
+
+# --------------------------------------------------------------------------------
+# Punto de reorden propio del artículo, o None para usar el de su categoría
+# --------------------------------------------------------------------------------
+def reorder_point_input(category, current=None, key=None):
+    default = storage.category_reorder_point(category)
+    use_default = st.checkbox(f"Usar el punto de reorden de la categoría ({default})",
+                              value=current is None or pd.isna(current), key=f"{key}_usar_categoria")
+    if use_default:
+        return None
+    value = default if current is None or pd.isna(current) else int(current)
+    return st.number_input("Punto de Reorden", min_value=0, value=value, step=1, key=f"{key}_punto")
+
+# --------------------------------------------------------------------------------
+# Precio unitario del artículo, o None si no tiene: los artículos sin precio
+# (como los de los catálogos de proveedores) siguen sin precio al editar otros
+# campos, y no se pueden vender hasta que se les asigne uno
+# --------------------------------------------------------------------------------
+def price_input(current=None, key=None):
+    no_price = st.checkbox("Sin precio", value=current is None or pd.isna(current), key=f"{key}_sin_precio")
+    if no_price:
+        return None
+    value = 0.0 if current is None or pd.isna(current) else float(current)
+    return st.number_input("Precio Unitario ($)", min_value=0.0, value=value, step=0.1, key=f"{key}_precio")
+
+# --------------------------------------------------------------------------------
+# Función para agregar una nueva entrada
+# --------------------------------------------------------------------------------
+def add_item(category):
+    code = st.text_input("Código del artículo (ID)")
+    name = st.text_input("Nombre del artículo")
+    quantity = st.number_input("Cantidad Disponible", min_value=0, step=1)
+    description = st.text_area("Descripción del artículo")
+    reorder_point = reorder_point_input(category, key=f"agregar_{category}")
+    unit_price = price_input(key=f"agregar_{category}")
+
+    new_item = {
+        "ID": code,
+        "Nombre": name,
+        "Cantidad": quantity,
+        "Precio Unitario": unit_price,
+        "Descripción": description,
+        "Punto de Reorden": reorder_point
+    }
+
+    if st.button(f"Agregar {category[:-1].capitalize()}"):
+        try:
+            services.add_item(category, new_item)
+        except (services.ValidationError, storage.DuplicateItemError) as e:
+            st.error(str(e))
+            return
+        st.success(f"El {category[:-1]} '{name}' ha sido agregado al inventario.")
+
+# --------------------------------------------------------------------------------
+# Función para actualizar un artículo existente. El stock se lee en cada recarga:
+# si cambió desde la anterior (ventas o reposiciones de otros usuarios), se avisa
+# y no se guarda hasta que el usuario vea la cantidad actual. La cantidad solo se
+# envía si difiere del stock actual, y con la condición de que siga siéndolo.
+# --------------------------------------------------------------------------------
+def update_item(category):
+    item_code = pick_item(category, f"Selecciona el ID del {category[:-1]} a actualizar", f"actualizar_{category}")
+    if item_code is None:
+        return
+    item_data = storage.find_item(category, item_code)
+
+    item_data = item_data.where(item_data.notna(), None)
+
+    # Stock mostrado en la recarga anterior de este formulario
+    current_quantity = int(item_data["Cantidad"])
+    shown_key = f"actualizar_{category}_{item_code}_cantidad"
+    shown_quantity = st.session_state.get(shown_key, current_quantity)
+    st.session_state[shown_key] = current_quantity
+    stock_changed = shown_quantity != current_quantity
+    if stock_changed:
+        st.warning(f"El stock de '{item_data['Nombre']}' cambió de {shown_quantity} a {current_quantity} "
+                   "mientras editabas. Revisa la cantidad antes de guardar.")
+
+    name = st.text_input("Nombre del artículo", value=item_data["Nombre"])
+    quantity = st.number_input("Cantidad Disponible", min_value=0, value=current_quantity, step=1)
+    description = st.text_area("Descripción del artículo", value=item_data["Descripción"])
+    reorder_point = reorder_point_input(category, item_data["Punto de Reorden"], key=f"actualizar_{category}_{item_code}")
+    unit_price = price_input(item_data["Precio Unitario"], key=f"actualizar_{category}_{item_code}")
+
+    if st.button(f"Actualizar {category[:-1]}"):
+        if stock_changed:
+            st.error("No se guardaron los cambios: el stock cambió. Revisa la cantidad y vuelve a guardar.")
+            return
+        updated_item = {
+            "Nombre": name,
+            "Precio Unitario": unit_price,
+            "Descripción": description,
+            "Punto de Reorden": reorder_point
+        }
+        if quantity != current_quantity:
+            updated_item["Cantidad"] = quantity
+
+        try:
+            services.update_item(category, item_code, updated_item, expected_quantity=current_quantity)
+        except storage.StockChangedError as e:
+            # En la siguiente recarga el formulario muestra el stock actual
+            st.session_state.pop(shown_key, None)
+            st.error(str(e))
+            return
+        except (services.ValidationError, services.NotFoundError) as e:
+            st.error(str(e))
+            return
+        st.session_state[shown_key] = quantity
+        st.success(f"El {category[:-1]} '{name}' ha sido actualizado.")
+
+# --------------------------------------------------------------------------------
+# Función para reponer un artículo: suma las unidades recibidas a su stock
+# --------------------------------------------------------------------------------
+def restock_item(category):
+    item_code = pick_item(category, f"Selecciona el ID del {category[:-1]} a reponer", f"reponer_{category}")
+    if item_code is None:
+        return
+
+    quantity = st.number_input("Unidades recibidas", min_value=1, step=1, key=f"reponer_{category}_cantidad")
+    reference = st.text_input("Referencia (factura o remisión del proveedor)", key=f"reponer_{category}_referencia")
+
+    if st.button(f"Reponer {category[:-1]}"):
+        try:
+            new_quantity = services.restock_item(category, item_code, quantity, reference)
+        except (services.ValidationError, services.NotFoundError) as e:
+            st.error(str(e))
+            return
+        st.success(f"Se agregaron {quantity} unidades al {category[:-1]} '{item_code}'. Stock actual: {new_quantity}.")
+
+# --------------------------------------------------------------------------------
+# Función para eliminar un artículo del inventario
+# --------------------------------------------------------------------------------
+def delete_item(category):
+    item_code = pick_item(category, f"Selecciona el ID del {category[:-1]} a eliminar", f"eliminar_{category}")
+    if item_code is None:
+        return
+
+    if st.button(f"Eliminar {category[:-1]}"):
+        try:
+            services.delete_item(category, item_code)
+        except services.NotFoundError as e:
+            st.error(str(e))
+            return
+        st.success(f"El {category[:-1]} con ID '{item_code}' ha sido eliminado del inventario.")
+
+# --------------------------------------------------------------------------------
+# Función para cargar un archivo CSV o Excel y fusionarlo con el inventario por ID
+# --------------------------------------------------------------------------------
+def bulk_load_inventory(category):
+    st.subheader(f"Carga Masiva de Inventario para {category[:-1].capitalize()}")
+
+    uploaded_file = st.file_uploader(f"Cargar archivo CSV o Excel para {category[:-1]}", type=["csv", "xlsx"])
+    mode = st.radio("Modo de carga", ["Actualizar y agregar por ID", "Reemplazar todo el inventario"])
+
+    if uploaded_file is not None and st.button("Importar archivo"):
+        try:
+            with st.spinner("Importando..."):
+                report = bulk_import.import_inventory(uploaded_file, uploaded_file.name, category,
+                                                      replace=mode == "Reemplazar todo el inventario")
+            st.success(f"Importación terminada: {report['insertados']} artículos nuevos, "
+                       f"{report['actualizados']} actualizados.")
+            if report["filas_con_error"]:
+                st.warning(f"{report['filas_con_error']} filas no se importaron por errores.")
+                st.dataframe(pd.DataFrame(report["errores"], columns=["Fila", "Error"]), hide_index=True)
+        except Exception as e:
+            st.error(f"Ocurrió un error al cargar el archivo: {str(e)}")
+
+# --------------------------------------------------------------------------------
+# Página de inventario de una categoría: tabla con búsqueda y la acción elegida
+# --------------------------------------------------------------------------------
+def view_inventory(category):
+    st.subheader(f"Inventario de {category[:-1].capitalize()}")
+    browse_inventory(category)
+
+    action = st.radio(f"Selecciona una acción para el {category[:-1]}", ["Agregar", "Actualizar", "Reponer", "Eliminar"])
+
+    if action == "Agregar":
+        add_item(category)
+    elif action == "Actualizar":
+        update_item(category)
+    elif action == "Reponer":
+        restock_item(category)
+    elif action == "Eliminar":
+        delete_item(category)
+
+# --------------------------------------------------------------------------------
+# Página de carga masiva
+# --------------------------------------------------------------------------------
+def view_bulk_load():
+    category = st.selectbox("Selecciona la categoría de inventario", CATEGORIES)
+    bulk_load_inventory(category)
@@ -0,0 +1,185 @@
+import datetime
+
+import streamlit as st
+import pandas as pd
+
+import storage
+import invoices
+import services
+from ui.common import CATEGORIES, pick_item
+
+# Páginas de ventas: registro con carrito, ventas por fecha con su factura,
+# facturas por rango de fechas y reportes
+
+# --------------------------------------------------------------------------------
+# Función para registrar una venta
+# --------------------------------------------------------------------------------
+def register_sale():
+    st.subheader("Registrar Venta")
+
+    # Carrito de la venta en curso: lista de (categoría, ID), se conserva entre recargas
+    cart = st.session_state.setdefault("carrito", [])
+
+    # Buscar un artículo con stock de cualquier categoría y agregarlo al carrito
+    category = st.selectbox("Categoría", CATEGORIES, key="venta_categoria")
+    item_id = pick_item(category, "Selecciona el artículo a vender", f"venta_{category}", in_stock_only=True)
+    if item_id is not None and st.button("Agregar al carrito") and (category, item_id) not in cart:
+        cart.append((category, item_id))
+
+    sale_lines = []
+    for entry in list(cart):
+        item_category, item_id = entry
+        item_data = storage.find_item(item_category, item_id)
+        if item_data is None or item_data["Cantidad"] <= 0:
+            cart.remove(entry)
+            continue
+        item_name = item_data["Nombre"]
+        item_price = item_data["Precio Unitario"]
+        item_stock = item_data["Cantidad"]
+
+        col1, col2 = st.columns([4, 1])
+        # Sin máximo: si otra caja vende entretanto, la cantidad pedida no se ajusta
+        # sola y la venta se rechaza por stock insuficiente al registrarla
+        quantity_to_sell = col1.number_input(f"Cantidad de {item_name} a vender", min_value=1, step=1,
+                                             key=f"cantidad_{item_category}_{item_id}")
+        if col2.button("Quitar", key=f"quitar_{item_category}_{item_id}"):
+            cart.remove(entry)
+            st.rerun()
+        if quantity_to_sell > item_stock:
+            col1.warning(f"Solo quedan {item_stock} unidades de {item_name}.")
+        if pd.isna(item_price):
+            col1.warning(f"{item_name} no tiene precio; actualízalo en el inventario antes de venderlo.")
+        elif quantity_to_sell > 0:
+            col1.caption(f"Precio Unitario: ${item_price} - Subtotal: ${item_price * quantity_to_sell}")
+        sale_lines.append({"Categoria": item_category, "ID": item_id, "Cantidad": quantity_to_sell})
+
+    customer_name = st.text_input("Nombre del Cliente")
+
+    if st.button("Registrar Venta"):
+        # Descontamos el stock y guardamos la venta en una sola transacción
+        try:
+            sale = services.record_sale(category, sale_lines, customer_name)
+        except (services.ValidationError, services.NotFoundError, storage.InsufficientStockError) as e:
+            st.error(str(e))
+            return
+
+        cart.clear()
+        st.success(f"Venta registrada: {customer_name} compró {sale['Cantidad']} artículos por un total de {sale['Total']}.")
+
+# --------------------------------------------------------------------------------
+# Función para visualizar las ventas por fecha con la opción de descargar factura
+# --------------------------------------------------------------------------------
+def view_sales_by_date():
+    st.subheader("Ver Ventas por Fecha")
+
+    # Selector de fecha
+    selected_date = st.date_input("Selecciona la fecha", datetime.date.today())
+
+    # Consultar solo las ventas del día seleccionado (índice por fecha)
+    filtered_sales = storage.read_sales_on(selected_date)
+
+    if not filtered_sales.empty:
+
+
+
+        st.write(f"Ventas registradas para el {selected_date}:")
+        st.dataframe(filtered_sales)
+
+        # Seleccionar una venta para ver detalles
+        sale_id = st.selectbox("Selecciona una venta para ver detalles", filtered_sales.index)
+        sale_data = filtered_sales.loc[sale_id]
+
+        sale_lines = storage.read_sale_items([sale_id])
+
+        # Mostrar detalles de la venta seleccionada
+        st.subheader("Detalles de la Venta")
+        st.write(f"**Cliente**: {sale_data['Cliente']}")
+        st.dataframe(sale_lines[["Nombre", "Cantidad", "Precio Unitario", "Total"]], hide_index=True)
+        st.write(f"**Cantidad Total**: {sale_data['Cantidad']}")
+        st.write(f"**Total de la Venta**: {sale_data['Total']}")
+
+        # Opción para generar factura en PDF (en memoria y en caché por venta)
+        if st.button("Generar Factura en PDF"):
+            file_name, pdf_bytes = services.sale_invoice(sale_id)
+            st.success(f"Factura generada: {file_name}")
+            st.download_button("Descargar Factura", pdf_bytes, file_name, "application/pdf")
+    else:
+        st.warning(f"No se encontraron ventas para el {selected_date}.")
+
+# --------------------------------------------------------------------------------
+# Función para descargar todas las facturas de un rango de fechas
+# --------------------------------------------------------------------------------
+def download_invoices_by_range():
+    st.subheader("Facturas por Rango de Fechas")
+
+    today = datetime.date.today()
+    date_range = st.date_input("Rango de fechas", (today, today), key="rango_facturas")
+    if len(date_range) != 2:
+        st.info("Selecciona la fecha final del rango.")
+        return
+    start, end = date_range[0], date_range[1] + datetime.timedelta(days=1)
+
+    output = st.radio("Formato", ["ZIP (un PDF por venta)", "Un solo PDF"], horizontal=True)
+    if st.button("Generar Facturas"):
+        with st.spinner("Generando facturas..."):
+            if output.startswith("ZIP"):
+                data, count = invoices.invoices_zip(start, end)
+                file_name, mime = f"Facturas_{date_range[0]}_{date_range[1]}.zip", "application/zip"
+            else:
+                data, count = invoices.invoices_pdf(start, end)
+                file_name, mime = f"Facturas_{date_range[0]}_{date_range[1]}.pdf", "application/pdf"
+        if not count:
+            st.warning("No hay ventas en el rango seleccionado.")
+            return
+        st.success(f"{count} facturas generadas.")
+        st.download_button("Descargar Facturas", data, file_name, mime)
+
+# --------------------------------------------------------------------------------
+# Función para ver reportes de ventas por día, semana o mes
+# --------------------------------------------------------------------------------
+def view_sales_reports():
+    st.subheader("Reportes de Ventas")
+
+    today = datetime.date.today()
+    date_range = st.date_input("Rango de fechas", (today - datetime.timedelta(days=90), today))
+    if len(date_range) != 2:
+        st.info("Selecciona la fecha final del rango.")
+        return
+    start, end = date_range
+
+    periods = {"Día": "D", "Semana": "W", "Mes": "M"}
+    period = st.radio("Agrupar por", list(periods), horizontal=True)
+
+    # El reporte se arma desde el resumen diario, no desde el historial completo
+    by_period, top_products = storage.sales_report(start, end + datetime.timedelta(days=1), periods[period])
+    if by_period.empty:
+        st.warning("No hay ventas en el rango seleccionado.")
+        return
+
+    col1, col2 = st.columns(2)
+    col1.metric("Ingresos", f"${by_period['Total'].sum():,.0f}")
+    col2.metric("Unidades vendidas", int(by_period["Cantidad"].sum()))
+
+    st.write(f"Ingresos por {period.lower()}:")
+    st.bar_chart(by_period["Total"])
+    st.dataframe(by_period, use_container_width=True)
+
+    st.write(f"Artículos más vendidos por {period.lower()}:")
+    latest_first = top_products.sort_values("Periodo", ascending=False, kind="stable")
+    st.dataframe(latest_first, use_container_width=True, hide_index=True)
+
+# --------------------------------------------------------------------------------
+# Página de ventas: registrar, consultar por fecha o descargar facturas
+# --------------------------------------------------------------------------------
+def view_sales():
+    action = st.radio("Selecciona una opción", ["Registrar Venta", "Ver Ventas por Fecha", "Facturas por Rango"])
+
+    if action == "Registrar Venta":
+        if st.session_state.role in ["admin", "vendedor"]:
+            register_sale()
+        else:
+            st.error("No tienes permisos para registrar ventas.")
+    elif action == "Ver Ventas por Fecha":
+        view_sales_by_date()
+    elif action == "Facturas por Rango":
+        download_invoices_by_range()
@@ -0,0 +1,106 @@
+import datetime
+
+import streamlit as st
+
+import storage
+import services
+from ui.common import CATEGORIES, add_stock_status, pick_item
+
+# Páginas de control de stock: alertas y reposición, y auditoría de movimientos
+
+# Segundos que dura el reporte de reposición en caché aunque no cambien los datos
+# (el ritmo de venta se mide sobre una ventana que avanza con el reloj)
+REORDER_REPORT_TTL = 600
+
+# --------------------------------------------------------------------------------
+# Reporte de reposición en la caché de Streamlit, compartida por todas las
+# sesiones. La versión del inventario y la última venta van en la clave: cualquier
+# cambio de stock o venta nueva lo recalcula, y los demás cambios de la página
+# (filtro, descarga) ya no recorren todo el inventario en cada recarga.
+# --------------------------------------------------------------------------------
+@st.cache_data(ttl=REORDER_REPORT_TTL, max_entries=32, show_spinner=False)
+def _reorder_report(days, cover_days, version):
+    return storage.reorder_report(days, cover_days)
+
+def reorder_report(days, cover_days):
+    version = (storage.export_versions(), storage.last_sale_id())
+    return _reorder_report(days, cover_days, version)
+
+# --------------------------------------------------------------------------------
+# Función para ver las alertas de stock bajo y las sugerencias de reposición
+# --------------------------------------------------------------------------------
+def view_stock_alerts():
+    st.subheader("Alertas de Stock y Reposición")
+
+    counts = storage.low_stock_counts()
+    columns = st.columns(len(CATEGORIES))
+    for column, category in zip(columns, CATEGORIES):
+        column.metric(category.capitalize(), counts.get(category, 0), help="Artículos bajo el punto de reorden")
+
+    if st.session_state.role == "admin":
+        with st.expander("Punto de reorden por categoría"):
+            category = st.selectbox("Categoría", CATEGORIES, key="reorden_categoria")
+            reorder_point = st.number_input("Punto de Reorden", min_value=0, step=1,
+                                            value=storage.category_reorder_point(category),
+                                            key=f"reorden_{category}")
+            if st.button("Guardar punto de reorden"):
+                storage.set_category_reorder_point(category, reorder_point)
+                st.success(f"Punto de reorden de {category} actualizado a {reorder_point}.")
+
+    col1, col2 = st.columns(2)
+    days = col1.number_input("Días de ventas para calcular el ritmo", min_value=1, value=30, step=1)
+    cover_days = col2.number_input("Días a cubrir con la reposición", min_value=1, value=30, step=1)
+
+    report = reorder_report(days, cover_days)
+    if st.checkbox("Solo artículos que requieren reposición", value=True):
+        report = report[report["Bajo Stock"] | (report["Días de Stock"] <= cover_days)]
+    if report.empty:
+        st.success("No hay artículos que requieran reposición.")
+        return
+
+    report = add_stock_status(report)
+    st.dataframe(report, use_container_width=True, hide_index=True)
+    st.download_button("Descargar reporte (CSV)", report.to_csv(index=False).encode("utf-8"),
+                       "Reposicion.csv", "text/csv")
+
+# --------------------------------------------------------------------------------
+# Función para auditar el stock: historial de movimientos de un artículo,
+# movimientos de un rango de fechas y stock de cada artículo al cierre de un día
+# --------------------------------------------------------------------------------
+def view_stock_movements():
+    st.subheader("Movimientos de Stock")
+
+    view = st.radio("Consulta", ["Historial de un artículo", "Movimientos por fecha", "Stock a una fecha"],
+                    horizontal=True)
+    if view == "Historial de un artículo":
+        category = st.selectbox("Categoría", CATEGORIES, key="movimientos_categoria")
+        item_id = pick_item(category, "Selecciona el artículo", f"movimientos_{category}")
+        if item_id is None:
+            return
+        movements = services.item_movements(category, item_id)
+        if movements.empty:
+            st.info("El artículo no tiene movimientos registrados.")
+            return
+        st.dataframe(movements, use_container_width=True)
+        return
+
+    category = st.selectbox("Categoría", ["todas", *CATEGORIES], key="movimientos_categoria")
+    category = None if category == "todas" else category
+    if view == "Movimientos por fecha":
+        today = datetime.date.today()
+        date_range = st.date_input("Rango de fechas", (today, today), key="movimientos_rango")
+        if len(date_range) != 2:
+            st.info("Selecciona la fecha final del rango.")
+            return
+        result = storage.read_movements(date_range[0], date_range[1] + datetime.timedelta(days=1), category)
+        file_name = f"Movimientos_{date_range[0]}_{date_range[1]}.csv"
+    else:
+        day = st.date_input("Stock al cierre del día", datetime.date.today(), key="movimientos_dia")
+        result = storage.stock_as_of(day + datetime.timedelta(days=1), category)
+        file_name = f"Stock_{day}.csv"
+
+    if result.empty:
+        st.warning("No hay datos para la consulta seleccionada.")
+        return
+    st.dataframe(result, use_container_width=True)
+    st.download_button("Descargar (CSV)", result.to_csv().encode("utf-8"), file_name, "text/csv")
@@ -0,0 +1,66 @@
+import streamlit as st
+
+import storage
+import auth
+
+# Usuarios y sesión: ingreso, cierre de sesión y alta de usuarios
+
+# Roles disponibles
+ROLES = ["admin", "vendedor", "bodega"]
+
+# --------------------------------------------------------------------------------
+# Función para agregar un nuevo usuario
+# --------------------------------------------------------------------------------
+def add_user():
+    if st.session_state.role != "admin":
+        st.error("No tienes permisos para agregar nuevos usuarios.")
+        return
+
+    st.subheader("Crear Nuevo Usuario")
+    new_username = st.text_input("Nombre de usuario")
+    new_password = st.text_input("Contraseña", type="password")
+    confirm_password = st.text_input("Confirmar Contraseña", type="password")
+    role = st.selectbox("Rol", ROLES)
+
+    if new_password != confirm_password:
+        st.error("Las contraseñas no coinciden.")
+        return
+
+    if st.button("Crear Usuario"):
+        if new_username in storage.read_user_index():
+            st.error("El nombre de usuario ya existe.")
+        else:
+            hashed_password = auth.hash_password(new_password)
+            storage.insert_user(new_username, hashed_password, role)
+            st.success(f"Usuario {new_username} creado con éxito.")
+
+# --------------------------------------------------------------------------------
+# Función para el login
+# --------------------------------------------------------------------------------
+def login():
+    st.sidebar.title("Login")
+    username = st.sidebar.text_input("Nombre de Usuario")
+    password = st.sidebar.text_input("Contraseña", type="password")
+
+    if st.sidebar.button("Ingresar"):
+        auth.ensure_default_user()
+        try:
+            token = auth.authenticate(username, password)
+        except auth.AuthenticationError as e:
+            st.sidebar.error(str(e))
+            return
+        session = auth.session_user(token)
+        st.session_state.token = token
+        st.session_state.logged_in = True
+        st.session_state.username = session["username"]
+        st.session_state.role = session["role"]
+        st.sidebar.success("¡Has ingresado correctamente!")
+        st.rerun()
+
+# --------------------------------------------------------------------------------
+# Función para cerrar la sesión
+# --------------------------------------------------------------------------------
+def logout():
+    auth.end_session(st.session_state.get("token"))
+    for key in ["token", "logged_in", "username", "role"]:
+        st.session_state.pop(key, None)